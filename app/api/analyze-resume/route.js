@@ -1,11 +1,13 @@
 import { NextResponse } from 'next/server';
 import { spawn } from 'child_process';
 import path from 'path';
+import { unlink } from 'fs/promises';
+import jwt from 'jsonwebtoken';
 
 export async function POST(request) {
   try {
     const body = await request.json();
-    const { resumeData, jobDescription } = body;
+    const { resumeData, jobDescription, previousAnalysis, requestId } = body;
 
     if (!resumeData) {
       return NextResponse.json(
@@ -31,18 +33,45 @@ export async function POST(request) {
     
     // Prepare arguments
     const args = [pythonScript, JSON.stringify(resumeData)];
-    if (jobDescription) {
-      args.push(jobDescription);
+    if (jobDescription || previousAnalysis) {
+      args.push(jobDescription || '');
+    }
+    if (previousAnalysis) {
+      // Lets the analyzer reuse the parts of an earlier analysis whose sections are unchanged
+      args.push(JSON.stringify(previousAnalysis));
+    }
+
+    // A cancel file lets /api/cancel-analysis stop this analysis explicitly
+    const cancelFile = requestId
+      ? path.join(process.cwd(), 'temp', `cancel-${String(requestId).replace(/[^a-zA-Z0-9-]/g, '_')}`)
+      : '';
+
+    // Near-duplicate reuse is limited to the signed-in user's own analyses
+    // (see services/near_duplicate.py); anonymous requests are not reused
+    let owner = '';
+    const token = request.headers.get('authorization')?.replace('Bearer ', '');
+    if (token && process.env.JWT_SECRET) {
+      try {
+        owner = String(jwt.verify(token, process.env.JWT_SECRET).userId || '');
+      } catch (error) {
+        console.error('JWT verification failed in analyze resume:', error.message);
+      }
     }
 
     // Pass environment variables to Python process
     const pythonProcess = spawn('python', args, {
       env: {
         ...process.env,
-        GEMINI_API_KEY: process.env.GEMINI_API_KEY
+        GEMINI_API_KEY: process.env.GEMINI_API_KEY,
+        CANCEL_FILE: cancelFile,
+        ANALYSIS_OWNER: owner
       }
     });
 
+    // Stop waiting on Gemini when the client disconnects
+    const cancelOnAbort = () => pythonProcess.kill('SIGTERM');
+    request.signal?.addEventListener('abort', cancelOnAbort, { once: true });
+
     let result = '';
     let error = '';
 
@@ -60,6 +89,10 @@ export async function POST(request) {
     const exitCode = await new Promise((resolve) => {
       pythonProcess.on('close', resolve);
     });
+    request.signal?.removeEventListener('abort', cancelOnAbort);
+    if (cancelFile) {
+      await unlink(cancelFile).catch(() => {});
+    }
 
     if (exitCode !== 0) {
       console.error('Python AI analyzer error:', error);
@@ -74,6 +107,10 @@ export async function POST(request) {
       const analysisResult = JSON.parse(result);
       console.log('Python AI result:', JSON.stringify(analysisResult, null, 2));
       
+      if (analysisResult.cancelled) {
+        return NextResponse.json(analysisResult, { status: 499 });
+      }
+
       if (analysisResult.error) {
         console.error('AI returned error:', analysisResult.error);
         return NextResponse.json(
@@ -0,0 +1,57 @@
+import { NextResponse } from 'next/server';
+import { writeFile, mkdir, readdir, stat, unlink } from 'fs/promises';
+import { existsSync } from 'fs';
+import path from 'path';
+
+// Cancel files older than this belong to requests that had already finished
+// when the cancel arrived (running requests delete their own file on exit)
+const CANCEL_FILE_MAX_AGE_MS = 15 * 60 * 1000;
+
+// Explicitly cancels an in-flight parse-resume, analyze-resume or resume/suggestions
+// request that was started with the same requestId. The Python service sees the
+// cancel file at its next checkpoint and stops.
+export async function POST(request) {
+  try {
+    const { requestId } = await request.json();
+
+    if (!requestId) {
+      return NextResponse.json(
+        { error: 'No requestId provided' },
+        { status: 400 }
+      );
+    }
+
+    const tempDir = path.join(process.cwd(), 'temp');
+    if (!existsSync(tempDir)) {
+      await mkdir(tempDir, { recursive: true });
+    }
+
+    const cancelFile = path.join(tempDir, `cancel-${String(requestId).replace(/[^a-zA-Z0-9-]/g, '_')}`);
+    await writeFile(cancelFile, String(Date.now()));
+    await removeStaleCancelFiles(tempDir);
+
+    return NextResponse.json({ cancelled: true, requestId });
+
+  } catch (error) {
+    console.error('Error cancelling analysis:', error);
+    return NextResponse.json(
+      { error: error.message || 'Failed to cancel analysis' },
+      { status: 500 }
+    );
+  }
+}
+
+async function removeStaleCancelFiles(tempDir) {
+  const now = Date.now();
+  const names = await readdir(tempDir).catch(() => []);
+  for (const name of names.filter((name) => name.startsWith('cancel-'))) {
+    const file = path.join(tempDir, name);
+    try {
+      if (now - (await stat(file)).mtimeMs > CANCEL_FILE_MAX_AGE_MS) {
+        await unlink(file);
+      }
+    } catch {
+      // Already removed by the request that owned it
+    }
+  }
+}
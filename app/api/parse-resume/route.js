@@ -3,11 +3,18 @@ import { writeFile, unlink, mkdir } from 'fs/promises';
 import { spawn } from 'child_process';
 import path from 'path';
 import { existsSync } from 'fs';
+import jwt from 'jsonwebtoken';
 
 export async function POST(request) {
   try {
     const formData = await request.formData();
     const file = formData.get('file');
+    const requestId = formData.get('requestId');
+    // analyze=true parses and runs the AI analysis in one Python process
+    const analyze = formData.get('analyze') === 'true';
+    const jobDescription = formData.get('jobDescription') || '';
+    // JSON of an earlier parse of this resume; unchanged sections are reused from it
+    const previousResult = formData.get('previousResult') || '';
 
     if (!file) {
       return NextResponse.json(
@@ -53,17 +60,51 @@ export async function POST(request) {
     
     await writeFile(tempPath, buffer);
 
+    // A cancel file lets /api/cancel-analysis stop this parse explicitly
+    const cancelFile = requestId
+      ? path.join(tempDir, `cancel-${String(requestId).replace(/[^a-zA-Z0-9-]/g, '_')}`)
+      : '';
+
+    // Near-duplicate reuse is limited to the signed-in user's own analyses
+    // (see services/near_duplicate.py); anonymous requests are not reused
+    let owner = '';
+    const token = request.headers.get('authorization')?.replace('Bearer ', '');
+    if (token && process.env.JWT_SECRET) {
+      try {
+        owner = String(jwt.verify(token, process.env.JWT_SECRET).userId || '');
+      } catch (error) {
+        console.error('JWT verification failed in parse resume:', error.message);
+      }
+    }
+
     try {
       // Call Python script (configurable path and binary)
       const configuredScript = process.env.PYTHON_PARSER_SCRIPT;
       const defaultScript = path.join(process.cwd(), 'services', 'resume_parser.py');
-      const pythonScript = configuredScript && configuredScript.trim().length > 0 ? configuredScript : defaultScript;
+      const parserScript = configuredScript && configuredScript.trim().length > 0 ? configuredScript : defaultScript;
+      const pythonScript = analyze ? path.join(process.cwd(), 'services', 'resume_pipeline.py') : parserScript;
       const pythonBinary = process.env.PYTHON_BIN || 'python';
+      const args = analyze ? [pythonScript, tempPath, jobDescription] : [pythonScript, tempPath];
+      if (previousResult) {
+        // The parser reads it from argv[2], the pipeline after the job description
+        args.push(previousResult);
+      }
       
-      const pythonProcess = spawn(pythonBinary, [pythonScript, tempPath], {
-        stdio: ['ignore', 'pipe', 'pipe']
+      const pythonProcess = spawn(pythonBinary, args, {
+        stdio: ['ignore', 'pipe', 'pipe'],
+        env: {
+          ...process.env,
+          CANCEL_FILE: cancelFile,
+          // Inspect uploads and extract them under CPU/memory/time limits
+          RESUME_PARSER_GUARDED: process.env.RESUME_PARSER_GUARDED || '1',
+          ANALYSIS_OWNER: owner
+        }
       });
 
+      // Stop parsing when the client disconnects; the parser exits at its next checkpoint
+      const cancelOnAbort = () => pythonProcess.kill('SIGTERM');
+      request.signal?.addEventListener('abort', cancelOnAbort, { once: true });
+
       let result = '';
       let error = '';
 
@@ -81,6 +122,7 @@ export async function POST(request) {
       const exitCode = await new Promise((resolve) => {
         pythonProcess.on('close', resolve);
       });
+      request.signal?.removeEventListener('abort', cancelOnAbort);
 
       if (exitCode !== 0) {
         console.error('Python script error:', error);
@@ -90,6 +132,14 @@ export async function POST(request) {
       // Parse the JSON result
       const parsedResult = JSON.parse(result);
 
+      if (parsedResult.cancelled) {
+        return NextResponse.json(parsedResult, { status: 499 });
+      }
+
+      if (parsedResult.rejected) {
+        return NextResponse.json(parsedResult, { status: 422 });
+      }
+
       if (parsedResult.error) {
         throw new Error(parsedResult.error);
       }
@@ -103,6 +153,9 @@ export async function POST(request) {
       } catch (e) {
         console.error('Error deleting temp file:', e);
       }
+      if (cancelFile) {
+        await unlink(cancelFile).catch(() => {});
+      }
     }
 
   } catch (error) {
@@ -1,6 +1,7 @@
 import { NextResponse } from 'next/server';
 import { spawn } from 'child_process';
 import path from 'path';
+import { unlink } from 'fs/promises';
 import { MongoClient, ObjectId } from 'mongodb';
 import jwt from 'jsonwebtoken';
 
@@ -27,7 +28,7 @@ export async function POST(request) {
     }
 
     const body = await request.json();
-    const { resumeData, currentScore, currentAnalysis, requestType = 'comprehensive' } = body;
+    const { resumeData, currentScore, currentAnalysis, requestType = 'comprehensive', requestId, previousSuggestions } = body;
 
     if (!resumeData) {
       return NextResponse.json(
@@ -58,14 +59,28 @@ export async function POST(request) {
     const pythonScript = path.join(process.cwd(), 'services', 'resume_improvement_ai.py');
     
     const args = [pythonScript, JSON.stringify(enhancedData)];
+    if (previousSuggestions) {
+      // Lets the service reuse the suggestions whose sections are unchanged
+      args.push(JSON.stringify(previousSuggestions));
+    }
+
+    // A cancel file lets /api/cancel-analysis stop this request explicitly
+    const cancelFile = requestId
+      ? path.join(process.cwd(), 'temp', `cancel-${String(requestId).replace(/[^a-zA-Z0-9-]/g, '_')}`)
+      : '';
 
     const pythonProcess = spawn('python', args, {
       env: {
         ...process.env,
-        GEMINI_API_KEY: process.env.GEMINI_API_KEY
+        GEMINI_API_KEY: process.env.GEMINI_API_KEY,
+        CANCEL_FILE: cancelFile
       }
     });
 
+    // Stop waiting on Gemini when the client disconnects
+    const cancelOnAbort = () => pythonProcess.kill('SIGTERM');
+    request.signal?.addEventListener('abort', cancelOnAbort, { once: true });
+
     let result = '';
     let error = '';
 
@@ -83,6 +98,10 @@ export async function POST(request) {
     const exitCode = await new Promise((resolve) => {
       pythonProcess.on('close', resolve);
     });
+    request.signal?.removeEventListener('abort', cancelOnAbort);
+    if (cancelFile) {
+      await unlink(cancelFile).catch(() => {});
+    }
 
     if (exitCode !== 0) {
       console.error('Python AI improvement error:', error);
@@ -94,6 +113,10 @@ export async function POST(request) {
     let suggestions;
     try {
       suggestions = JSON.parse(result);
+
+      if (suggestions.cancelled) {
+        return NextResponse.json(suggestions, { status: 499 });
+      }
       
       if (suggestions.error) {
         console.error('AI returned error:', suggestions.error);
@@ -0,0 +1,185 @@
+import sys
+import json
+import os
+from cancellation import OperationCancelled, check, token_from_environment
+from gemini_client import generate_text
+from model_router import choose_model
+from response_decoder import BATCH_ITEM_SCHEMA, ResponseDecodeError, decode_json, validate
+from resume_ai_analyzer import REVIEWER_INSTRUCTIONS, SCORING_GUIDELINES, calculate_basic_score
+
+# Resumes packed into one prompt, and how often a failed item is re-queued
+BATCH_SIZE = int(os.getenv('BULK_SCORING_BATCH_SIZE', '8'))
+MAX_ATTEMPTS = 3
+
+BREAKDOWN_KEYS = ("content_quality", "ats_optimization", "skills_relevance", "experience_presentation", "formatting")
+
+
+def compact_summary(resume_data):
+    """One short block per resume; enough to score, small enough to batch"""
+    experience = [e[:160] for e in resume_data.get('experience', [])[:3]]
+    education = [e[:120] for e in resume_data.get('education', [])[:2]]
+    contact = resume_data.get('contact', {})
+    return (
+        f"SKILLS: {', '.join(resume_data.get('skills', [])[:15])}\n"
+        f"EXPERIENCE: {' | '.join(experience)}\n"
+        f"EDUCATION: {' | '.join(education)}\n"
+        f"CONTACT: email={'yes' if contact.get('emails') else 'no'}, phone={'yes' if contact.get('phones') else 'no'}\n"
+        f"WORD COUNT: {resume_data.get('word_count', 0)}"
+    )
+
+
+def build_batch_prompt(batch, job_description=None):
+    """Prompt scoring every (item_id, resume_data) in batch against the shared rubric"""
+    resumes = '\n\n'.join(f"=== RESUME {item_id} ===\n{compact_summary(resume_data)}" for item_id, resume_data in batch)
+    return f"""{REVIEWER_INSTRUCTIONS}
+
+Score EACH of the following {len(batch)} resumes independently.
+{f"TARGET JOB DESCRIPTION (applies to all): {job_description}" if job_description else ""}
+
+{resumes}
+
+Return ONE JSON object in exactly this format, with one entry per resume ID above:
+
+{{
+  "results": [
+    {{
+      "id": "<resume ID>",
+      "overall_score": <number 0-100>,
+      "score_breakdown": {{
+        "content_quality": <0-100>,
+        "ats_optimization": <0-100>,
+        "skills_relevance": <0-100>,
+        "experience_presentation": <0-100>,
+        "formatting": <0-100>
+      }},
+      "strengths": ["1-2 genuine strong points"],
+      "weaknesses": ["2-3 critical weaknesses"]
+    }}
+  ]
+}}
+
+{SCORING_GUIDELINES}
+
+Provide ONLY the JSON response, no additional text."""
+
+
+def validate_item(item):
+    """Return a cleaned per-resume result, or None if it is unusable"""
+    try:
+        result = validate(item, BATCH_ITEM_SCHEMA)
+    except ResponseDecodeError:
+        return None
+    return {
+        "overall_score": result['overall_score'],
+        "score_breakdown": {key: result['score_breakdown'][key] for key in BREAKDOWN_KEYS},
+        "strengths": [s for s in result['strengths'] if isinstance(s, str)],
+        "weaknesses": [w for w in result['weaknesses'] if isinstance(w, str)],
+        "method": "ai_batch"
+    }
+
+
+def score_batch(model, batch, job_description=None, cancel_token=None):
+    """
+    Score one batch with a single model call.
+
+    Returns:
+        Dict of item_id -> validated result for the items that came back valid
+    """
+    data = decode_json(generate_text(model, build_batch_prompt(batch, job_description), cancel_token=cancel_token))
+    items = data.get('results', []) if isinstance(data, dict) else data
+    expected = {item_id for item_id, _ in batch}
+
+    scored = {}
+    for item in items if isinstance(items, list) else []:
+        item_id = str(item.get('id')) if isinstance(item, dict) else None
+        result = validate_item(item)
+        if item_id in expected and result:
+            scored[item_id] = result
+    return scored
+
+
+def score_resumes(resumes, job_description=None, batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS, cancel_token=None):
+    """
+    Score many resumes with batched Gemini calls.
+
+    Args:
+        resumes: Dict of caller ID -> parsed resume data
+        job_description: Optional job description shared by all resumes
+        batch_size: Resumes per model call
+        max_attempts: Times an item is tried before falling back
+        cancel_token: Optional CancellationToken; once cancelled no further
+            batches are sent and the remaining items get the basic score
+
+    Returns:
+        Dict of caller ID -> result. Items missing or invalid in a batch
+        response are re-queued and batched together again in the next
+        round; items that never score get calculate_basic_score with an
+        'ai_error'.
+    """
+    # Short positional IDs keep the prompt small and unambiguous
+    by_item_id = {f"R{index}": caller_id for index, caller_id in enumerate(resumes, start=1)}
+    pending = list(by_item_id)
+    results = {}
+    last_error = None
+
+    api_key = os.getenv('GEMINI_API_KEY')
+    try:
+        import google.generativeai as genai
+    except ImportError:
+        genai = None
+
+    if not api_key:
+        last_error = "GEMINI_API_KEY not found in environment variables"
+    elif genai is None:
+        last_error = "google-generativeai not installed. Run: pip install google-generativeai"
+    else:
+        genai.configure(api_key=api_key)
+        # Bulk rescoring is routine work, so it goes to the fastest healthy tier
+        model = genai.GenerativeModel(choose_model({}, job_description, depth='quick'))
+
+        for _ in range(max_attempts):
+            failed = []
+            for start in range(0, len(pending), batch_size):
+                batch = [(item_id, resumes[by_item_id[item_id]]) for item_id in pending[start:start + batch_size]]
+                try:
+                    check(cancel_token)
+                    scored = score_batch(model, batch, job_description, cancel_token)
+                except OperationCancelled as e:
+                    last_error = f"Bulk scoring cancelled: {e}"
+                    failed.extend(pending[start:])
+                    break
+                except Exception as e:
+                    last_error = f"Batch scoring failed: {str(e)}"
+                    scored = {}
+                for item_id, _ in batch:
+                    if item_id in scored:
+                        results[by_item_id[item_id]] = scored[item_id]
+                    else:
+                        failed.append(item_id)
+            pending = failed
+            if not pending or (cancel_token is not None and cancel_token.cancelled):
+                break
+            last_error = last_error or "Missing or invalid result in batch response"
+
+    for item_id in pending:
+        caller_id = by_item_id[item_id]
+        results[caller_id] = {**calculate_basic_score(resumes[caller_id]), "ai_error": last_error}
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({"error": "Path to a JSON file of {id: resume_data} required"}))
+        sys.exit(1)
+
+    try:
+        with open(sys.argv[1]) as f:
+            resumes = json.load(f)
+        if not isinstance(resumes, dict) or not all(isinstance(data, dict) for data in resumes.values()):
+            print(json.dumps({"error": "Input file must contain a JSON object of {id: resume_data}"}))
+            sys.exit(1)
+        job_description = sys.argv[2] if len(sys.argv) > 2 else None
+        print(json.dumps(score_resumes(resumes, job_description, cancel_token=token_from_environment()), indent=2))
+    except (OSError, json.JSONDecodeError) as e:
+        print(json.dumps({"error": f"Invalid input file: {str(e)}"}))
+        sys.exit(1)
@@ -0,0 +1,68 @@
+import os
+import signal
+import threading
+
+
+class OperationCancelled(Exception):
+    """Raised at a cancellation checkpoint once the operation has been cancelled"""
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation flag checked between units of work.
+
+    A token is cancelled explicitly with cancel(), when its cancel file
+    appears (an explicit cancel request from the web app), or, when
+    watch_parent is set, when the spawning process goes away (the client
+    disconnected and the route died with it).
+    """
+
+    def __init__(self, cancel_file=None, watch_parent=False):
+        self.cancel_file = cancel_file
+        self.reason = None
+        self._event = threading.Event()
+        self._parent_pid = os.getppid() if watch_parent else None
+
+    def cancel(self, reason="Operation cancelled"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self):
+        if not self._event.is_set():
+            if self.cancel_file and os.path.exists(self.cancel_file):
+                self.cancel("Cancelled by request")
+            elif self._parent_pid is not None and os.getppid() != self._parent_pid:
+                self.cancel("Client disconnected")
+        return self._event.is_set()
+
+    def check(self):
+        """Raise OperationCancelled if the token has been cancelled"""
+        if self.cancelled:
+            raise OperationCancelled(self.reason)
+
+
+def check(token):
+    """Checkpoint helper for code where the token is optional"""
+    if token is not None:
+        token.check()
+
+
+def token_from_environment():
+    """
+    Token for a service process spawned by the web app.
+
+    Cancelled by SIGTERM/SIGINT (the route kills the process when the client
+    disconnects), by the file named in CANCEL_FILE appearing, or by the
+    parent process exiting.
+    """
+    token = CancellationToken(cancel_file=os.getenv('CANCEL_FILE'), watch_parent=True)
+
+    def handle_signal(signum, frame):
+        token.cancel("Client disconnected")
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, handle_signal)
+        signal.signal(signal.SIGINT, handle_signal)
+    return token
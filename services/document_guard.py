@@ -0,0 +1,166 @@
+import os
+import re
+import time
+import multiprocessing
+from pathlib import Path
+from cancellation import check
+
+# Limits for guarded extraction (see extract_text_guarded)
+MAX_PAGES = int(os.getenv('GUARD_MAX_PAGES', '20'))
+MAX_PDF_OBJECTS = int(os.getenv('GUARD_MAX_PDF_OBJECTS', '50000'))
+MAX_UNCOMPRESSED_MB = int(os.getenv('GUARD_MAX_UNCOMPRESSED_MB', '50'))
+MAX_COMPRESSION_RATIO = int(os.getenv('GUARD_MAX_COMPRESSION_RATIO', '100'))
+CPU_SECONDS = int(os.getenv('GUARD_CPU_SECONDS', '15'))
+WALL_SECONDS = float(os.getenv('GUARD_WALL_SECONDS', '30'))
+MEMORY_MB = int(os.getenv('GUARD_MEMORY_MB', '1024'))
+
+PDF_PAGE_PATTERN = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+PDF_OBJECT_PATTERN = re.compile(rb'\d+\s+\d+\s+obj\b')
+PDF_OBJECT_STREAM_PATTERN = re.compile(rb'/Type\s*/ObjStm\b.{0,200}?/N\s+(\d+)', re.DOTALL)
+
+
+def inspect_pdf(data):
+    """
+    Count pages and objects from the raw PDF bytes, without parsing it.
+    Pages inside compressed object streams are not visible here, so the page
+    count is informational; truncation is decided during extraction.
+    """
+    # Objects packed into object streams are not visible as "n 0 obj" headers
+    packed = sum(int(n) for n in PDF_OBJECT_STREAM_PATTERN.findall(data))
+    report = {
+        "type": "pdf",
+        "size": len(data),
+        "pages": len(PDF_PAGE_PATTERN.findall(data)),
+        "objects": len(PDF_OBJECT_PATTERN.findall(data)) + packed,
+    }
+    if not data.lstrip()[:5] == b'%PDF-':
+        return {**report, "verdict": "reject", "reason": "File is not a PDF"}
+    if report["objects"] > MAX_PDF_OBJECTS:
+        return {**report, "verdict": "reject", "reason": f"PDF has {report['objects']} objects (limit {MAX_PDF_OBJECTS})"}
+    return {**report, "verdict": "ok"}
+
+
+def inspect_docx(path):
+    """Check the DOCX zip directory for decompression bombs, without extracting it"""
+    import zipfile
+
+    try:
+        with zipfile.ZipFile(path) as archive:
+            entries = archive.infolist()
+    except zipfile.BadZipFile:
+        return {"type": "docx", "verdict": "reject", "reason": "File is not a valid DOCX archive"}
+
+    compressed = sum(entry.compress_size for entry in entries) or 1
+    uncompressed = sum(entry.file_size for entry in entries)
+    report = {"type": "docx", "size": os.path.getsize(path), "entries": len(entries), "uncompressed": uncompressed}
+    if uncompressed > MAX_UNCOMPRESSED_MB * 1024 * 1024:
+        return {**report, "verdict": "reject", "reason": f"DOCX expands to {uncompressed // (1024 * 1024)}MB (limit {MAX_UNCOMPRESSED_MB}MB)"}
+    if uncompressed / compressed > MAX_COMPRESSION_RATIO:
+        return {**report, "verdict": "reject", "reason": f"DOCX compression ratio {uncompressed // compressed}:1 looks like a decompression bomb"}
+    return {**report, "verdict": "ok"}
+
+
+def inspect_document(file_path):
+    """
+    Cheap structural check run before extraction.
+
+    Returns:
+        Dict describing the document with a 'verdict' of 'ok' or 'reject',
+        and a 'reason' when rejected.
+    """
+    file_path = Path(file_path)
+    suffix = file_path.suffix.lower()
+    if suffix == '.pdf':
+        with open(file_path, 'rb') as f:
+            return inspect_pdf(f.read())
+    if suffix == '.docx':
+        return inspect_docx(file_path)
+    return {"type": suffix.lstrip('.'), "size": os.path.getsize(file_path), "verdict": "ok"}
+
+
+def _limit_resources():
+    """Apply CPU and address-space limits to the current (child) process, where supported"""
+    try:
+        import resource
+    except ImportError:  # Windows: only the wall-clock limit applies
+        return
+    resource.setrlimit(resource.RLIMIT_CPU, (CPU_SECONDS, CPU_SECONDS + 1))
+    memory = MEMORY_MB * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+
+
+def _extract_in_child(conn, file_path):
+    _limit_resources()
+    import resume_parser
+    try:
+        stats = {}
+        text = resume_parser.extract_text(file_path, max_pages=MAX_PAGES, stats=stats)
+        conn.send(("ok", (text, stats)))
+    except MemoryError:
+        conn.send(("rejected", f"Extraction exceeded the {MEMORY_MB}MB memory limit"))
+    except Exception as e:
+        conn.send(("error", str(e)))
+    conn.close()
+
+
+def extract_text_guarded(file_path, cancel_token=None):
+    """
+    Extract text in an isolated subprocess under CPU, wall-clock and memory
+    limits, reading at most MAX_PAGES pages of a PDF.
+
+    Returns:
+        Dict with 'status' ('ok', 'truncated' or 'rejected'), 'text' (None
+        when rejected), 'reason' and the 'inspection' report.
+    """
+    try:
+        inspection = inspect_document(file_path)
+    except OSError as e:
+        raise ValueError(f"Error reading file: {str(e)}")
+    if inspection["verdict"] == "reject":
+        return {"status": "rejected", "text": None, "reason": inspection["reason"], "inspection": inspection}
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_extract_in_child, args=(child_conn, str(file_path)), daemon=True
+    )
+    process.start()
+    child_conn.close()
+
+    deadline = time.monotonic() + WALL_SECONDS
+    try:
+        while not parent_conn.poll(0.1):
+            check(cancel_token)
+            if time.monotonic() >= deadline:
+                return {"status": "rejected", "text": None, "inspection": inspection,
+                        "reason": f"Extraction exceeded the {WALL_SECONDS:g}s time limit"}
+            if not process.is_alive():
+                break
+        try:
+            status, value = parent_conn.recv()
+        except EOFError:
+            # The child died without answering, e.g. killed by RLIMIT_CPU
+            process.join()
+            return {"status": "rejected", "text": None, "inspection": inspection,
+                    "reason": f"Extraction was stopped by a resource limit (exit code {process.exitcode})"}
+    finally:
+        if process.is_alive():
+            process.kill()
+        process.join()
+        parent_conn.close()
+
+    if status == "rejected":
+        return {"status": "rejected", "text": None, "reason": value, "inspection": inspection}
+    if status == "error":
+        raise ValueError(value)
+    text, stats = value
+    # Counted by the PDF library, so pages in compressed object streams are included
+    if stats.get("pages", 0) > stats.get("pages_read", 0):
+        return {
+            "status": "truncated",
+            "text": text,
+            "reason": f"PDF has {stats['pages']} pages; only the first {stats['pages_read']} are read",
+            "inspection": {**inspection, "pages": stats["pages"]}
+        }
+    return {"status": "ok", "text": text, "reason": None, "inspection": inspection}
@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import queue
+import tempfile
+import threading
+from cancellation import check
+from rate_limiter import RateLimitTimeout, acquire, estimate_tokens
+
+# Rolling window of observed per-model call outcomes (latency, success and time),
+# shared by every service process through a small JSON file
+LATENCY_STATS_PATH = os.getenv(
+    'LLM_LATENCY_STATS_PATH',
+    os.path.join(tempfile.gettempdir(), 's3dashboard_llm_latency.json')
+)
+LATENCY_WINDOW = 50
+MIN_SAMPLES = 5
+# Outcomes older than this are ignored, so a tier skipped after a burst of
+# errors (see model_router) becomes eligible again once the burst ages out
+STATS_MAX_AGE_SECONDS = float(os.getenv('LLM_STATS_MAX_AGE_SECONDS', '600'))
+
+# A duplicate request is sent once the first one is slower than this
+# percentile of recent latencies (or DEFAULT_HEDGE_AFTER without history)
+HEDGE_PERCENTILE = 0.9
+DEFAULT_HEDGE_AFTER = 8.0
+
+# How often a waiting call checks its cancellation token
+CANCEL_POLL_INTERVAL = 0.1
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a model call does not complete within its latency budget"""
+
+
+def load_latency_stats():
+    """Return {model name: [[latency in seconds, 1 if it succeeded else 0, timestamp], ...]}
+    with only the outcomes recorded within STATS_MAX_AGE_SECONDS"""
+    try:
+        with open(LATENCY_STATS_PATH) as f:
+            stats = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # Skip expired entries and entries from older formats of the file
+    oldest = time.time() - STATS_MAX_AGE_SECONDS
+    return {
+        model_name: [entry for entry in window if isinstance(entry, list) and len(entry) == 3 and entry[2] >= oldest]
+        for model_name, window in stats.items() if isinstance(window, list)
+    }
+
+
+def record_call(model_name, seconds, ok=True):
+    """Append one call outcome to the model's rolling window"""
+    stats = load_latency_stats()
+    stats[model_name] = (stats.get(model_name, []) + [[round(seconds, 3), int(ok), round(time.time(), 1)]])[-LATENCY_WINDOW:]
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(LATENCY_STATS_PATH))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(stats, f)
+        os.replace(tmp_path, LATENCY_STATS_PATH)
+    except OSError:
+        pass
+
+
+def latency_percentile(model_name, percentile, stats=None):
+    """Return the given percentile of recent successful latencies, or None with too little history"""
+    stats = stats if stats is not None else load_latency_stats()
+    samples = sorted(latency for latency, ok, _ in stats.get(model_name, []) if ok)
+    if len(samples) < MIN_SAMPLES:
+        return None
+    return samples[min(len(samples) - 1, int(percentile * len(samples)))]
+
+
+def error_rate(model_name, stats=None):
+    """Return the fraction of recent calls that failed, or 0.0 with too little history"""
+    stats = stats if stats is not None else load_latency_stats()
+    window = stats.get(model_name, [])
+    if len(window) < MIN_SAMPLES:
+        return 0.0
+    return sum(1 for _, ok, _ in window if not ok) / len(window)
+
+
+def hedge_threshold(model_name, budget_seconds):
+    """Seconds to wait for the first request before sending a hedged duplicate"""
+    threshold = latency_percentile(model_name, HEDGE_PERCENTILE) or DEFAULT_HEDGE_AFTER
+    # Leave the hedged request at least half the budget to finish in
+    return min(threshold, budget_seconds / 2)
+
+
+def generate_text(model, prompt, budget_seconds=None, cancel_token=None):
+    """
+    Run model.generate_content(prompt) and return the response text.
+
+    Every request first waits for its share of the Gemini quota from the
+    cross-process rate limiter (see rate_limiter).
+
+    Without a budget or cancel token this is a plain blocking call. With
+    budget_seconds, a duplicate request is sent if the first has not
+    returned within the hedge threshold, the first response to arrive wins,
+    and DeadlineExceeded is raised (and recorded as a failure) once the
+    budget is spent. With cancel_token, OperationCancelled is raised as soon
+    as it is cancelled. Abandoned requests finish in daemon threads; their
+    outcome is recorded in the stats but otherwise discarded.
+    """
+    model_name = getattr(model, 'model_name', 'unknown')
+    check(cancel_token)
+
+    if budget_seconds is None and cancel_token is None:
+        # Wait for shared quota first so queueing time is not counted as model latency
+        acquire(model_name, estimate_tokens(prompt))
+        started = time.monotonic()
+        try:
+            text = model.generate_content(prompt).text
+        except Exception:
+            record_call(model_name, time.monotonic() - started, ok=False)
+            raise
+        record_call(model_name, time.monotonic() - started)
+        return text
+
+    results = queue.Queue()
+    start = time.monotonic()
+    deadline = start + budget_seconds if budget_seconds is not None else None
+    hedge_at = start + hedge_threshold(model_name, budget_seconds) if budget_seconds is not None else None
+
+    def attempt():
+        try:
+            timeout = max(0, deadline - time.monotonic()) if deadline is not None else None
+            acquire(model_name, estimate_tokens(prompt), timeout=timeout, cancel_token=cancel_token)
+        except RateLimitTimeout as e:
+            results.put((False, DeadlineExceeded(str(e))))
+            return
+        except Exception as e:  # OperationCancelled, or any other limiter failure
+            results.put((False, e))
+            return
+        # Every attempt is recorded when it finishes, including ones that lost
+        # to their hedge or outlived the deadline, so slow calls stay in the stats
+        started = time.monotonic()
+        try:
+            text = model.generate_content(prompt).text
+        except Exception as e:
+            record_call(model_name, time.monotonic() - started, ok=False)
+            results.put((False, e))
+            return
+        record_call(model_name, time.monotonic() - started)
+        results.put((True, text))
+
+    threading.Thread(target=attempt, daemon=True).start()
+    attempts, failures = 1, 0
+
+    while True:
+        check(cancel_token)
+        now = time.monotonic()
+        if deadline is not None and now >= deadline:
+            record_call(model_name, budget_seconds, ok=False)
+            raise DeadlineExceeded(f"Model call exceeded its {budget_seconds:.1f}s latency budget")
+        wake_at = [t for t in (hedge_at if attempts == 1 else None, deadline) if t is not None]
+        timeout = max(0, min(wake_at) - now) if wake_at else None
+        if cancel_token is not None:
+            timeout = CANCEL_POLL_INTERVAL if timeout is None else min(timeout, CANCEL_POLL_INTERVAL)
+        try:
+            ok, value = results.get(timeout=timeout)
+        except queue.Empty:
+            if hedge_at is not None and attempts == 1 and time.monotonic() >= hedge_at:
+                threading.Thread(target=attempt, daemon=True).start()
+                attempts += 1
+            continue
+
+        if ok:
+            return value
+        failures += 1
+        if failures >= attempts:
+            raise value
@@ -0,0 +1,71 @@
+import os
+from gemini_client import error_rate, latency_percentile, load_latency_stats
+
+# Configured model tiers, fastest/cheapest first
+MODEL_TIERS = [
+    tier.strip()
+    for tier in os.getenv('GEMINI_MODEL_TIERS', 'models/gemini-1.5-flash,models/gemini-1.5-pro').split(',')
+    if tier.strip()
+]
+
+# Inputs above these sizes are routed to the heavier tier on 'standard' depth
+HEAVY_WORD_COUNT = int(os.getenv('GEMINI_HEAVY_WORD_COUNT', '1000'))
+HEAVY_JOB_DESCRIPTION_WORDS = int(os.getenv('GEMINI_HEAVY_JOB_WORDS', '150'))
+
+# A tier is skipped while more than this fraction of its recent calls failed;
+# outcomes expire after gemini_client.STATS_MAX_AGE_SECONDS, so skipping is temporary
+MAX_ERROR_RATE = float(os.getenv('GEMINI_MAX_ERROR_RATE', '0.3'))
+
+DEPTHS = ('quick', 'standard', 'deep')
+
+
+def preferred_tier(resume_data, job_description=None, depth='standard'):
+    """
+    Index into MODEL_TIERS suggested by the request alone.
+
+    'quick' always uses the fastest tier and 'deep' the heaviest. 'standard'
+    moves up one tier for long resumes or long job descriptions.
+    """
+    if depth == 'quick':
+        return 0
+    if depth == 'deep':
+        return len(MODEL_TIERS) - 1
+
+    job_words = len(job_description.split()) if job_description else 0
+    if resume_data.get('word_count', 0) > HEAVY_WORD_COUNT or job_words > HEAVY_JOB_DESCRIPTION_WORDS:
+        return min(1, len(MODEL_TIERS) - 1)
+    return 0
+
+
+def is_healthy(model_name, budget_seconds=None, stats=None):
+    """A tier is healthy if its recent error rate is acceptable and, given a
+    budget, its recent p90 latency fits within it"""
+    if error_rate(model_name, stats) > MAX_ERROR_RATE:
+        return False
+    if budget_seconds is not None:
+        p90 = latency_percentile(model_name, 0.9, stats)
+        if p90 is not None and p90 > budget_seconds:
+            return False
+    return True
+
+
+def choose_model(resume_data, job_description=None, depth='standard', budget_seconds=None):
+    """
+    Pick the Gemini model for one request.
+
+    Starts from the tier preferred for the input size and depth, then, using
+    the rolling per-model stats kept by gemini_client, falls back to the
+    nearest healthy tier (cheaper ones first). If no tier is healthy the
+    preferred one is used anyway. Stats expire with age, so a tier skipped
+    after a burst of errors is tried again once they age out.
+    """
+    if depth not in DEPTHS:
+        depth = 'standard'
+
+    preferred = preferred_tier(resume_data, job_description, depth)
+    stats = load_latency_stats()
+    candidates = [preferred] + list(range(preferred - 1, -1, -1)) + list(range(preferred + 1, len(MODEL_TIERS)))
+    for index in candidates:
+        if is_healthy(MODEL_TIERS[index], budget_seconds, stats):
+            return MODEL_TIERS[index]
+    return MODEL_TIERS[preferred]
@@ -0,0 +1,192 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import sqlite3
+import tempfile
+
+# Analyses of earlier resumes, indexed by MinHash signature, in one SQLite file.
+# Entries are scoped per user (see resume_ai_analyzer): an analysis quotes the
+# resume it was made for, so it is never reused for someone else's upload.
+NEAR_DUPLICATE_DB_PATH = os.getenv(
+    'NEAR_DUPLICATE_DB_PATH',
+    os.path.join(tempfile.gettempdir(), 's3dashboard_near_duplicates.sqlite3')
+)
+
+# Estimated Jaccard similarity above which an earlier analysis is reused (above 1 disables reuse)
+THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.9'))
+MAX_ENTRIES = int(os.getenv('NEAR_DUPLICATE_MAX_ENTRIES', '10000'))
+
+# 16 bands of 8 rows: pairs at 0.9 similarity share a band ~99.9% of the time,
+# pairs at 0.5 only ~6%, so candidates are few and verified against the full signature
+NUM_PERMUTATIONS = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_SIZE = 3
+
+# Largest prime below 2**32: signature values stay exact through JSON in
+# JavaScript (the web app passes parsed resumes back to the analyzer)
+HASH_PRIME = 4294967291
+_random = random.Random(42)  # fixed seed: signatures must be comparable across processes
+PERMUTATIONS = [
+    (_random.randrange(1, HASH_PRIME), _random.randrange(0, HASH_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+# Trivial edits (contact details, dates, numbers) should not change the signature
+EMAIL_PATTERN = re.compile(r'\S+@\S+')
+URL_PATTERN = re.compile(r'(?:https?://|www\.)\S+')
+DIGIT_PATTERN = re.compile(r'\d+')
+TOKEN_PATTERN = re.compile(r'[a-z#+]+')
+
+# Analysis fields recomputed per request rather than reused from a stored entry
+PROVENANCE_FIELDS = ('fingerprints', 'job_description_fingerprint', 'reused', 'regenerated_sections',
+                     'near_duplicate', 'similarity')
+
+
+def normalize_text(text):
+    """Lowercase word tokens per line, with emails, URLs and numbers masked out"""
+    text = EMAIL_PATTERN.sub(' ', (text or '').lower())
+    text = DIGIT_PATTERN.sub('#', URL_PATTERN.sub(' ', text))
+    return [tokens for tokens in map(TOKEN_PATTERN.findall, text.splitlines()) if tokens]
+
+
+def minhash_signature(text):
+    """
+    MinHash signature of the word shingles of the normalized text.
+
+    Shingles never span lines and form a set, so reordered bullets leave the
+    signature unchanged. Returns a list of NUM_PERMUTATIONS ints below
+    2**32, or None for empty text.
+    """
+    shingles = {
+        ' '.join(tokens[i:i + SHINGLE_SIZE])
+        for tokens in normalize_text(text)
+        for i in range(max(1, len(tokens) - SHINGLE_SIZE + 1))
+    }
+    hashes = [int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big') for shingle in shingles]
+    if not hashes:
+        return None
+    return [min((a * h + b) % HASH_PRIME for h in hashes) for a, b in PERMUTATIONS]
+
+
+def estimate_similarity(signature, other):
+    """Estimated Jaccard similarity of the documents behind two signatures"""
+    return sum(1 for x, y in zip(signature, other) if x == y) / NUM_PERMUTATIONS
+
+
+def _band_hashes(signature):
+    return [
+        hashlib.blake2b(json.dumps(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]).encode(), digest_size=8).hexdigest()
+        for band in range(BANDS)
+    ]
+
+
+def _connect():
+    conn = sqlite3.connect(NEAR_DUPLICATE_DB_PATH, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS entries (id INTEGER PRIMARY KEY AUTOINCREMENT, scope TEXT, signature TEXT, analysis TEXT, created REAL, inputs TEXT)")
+    if 'inputs' not in [row[1] for row in conn.execute("PRAGMA table_info(entries)")]:
+        # Entries stored before inputs were recorded have none and never match
+        conn.execute("ALTER TABLE entries ADD COLUMN inputs TEXT")
+    conn.execute("CREATE TABLE IF NOT EXISTS bands (scope TEXT, band INTEGER, hash TEXT, entry_id INTEGER)")
+    conn.execute("CREATE INDEX IF NOT EXISTS bands_lookup ON bands (scope, band, hash)")
+    conn.execute("CREATE INDEX IF NOT EXISTS bands_entry ON bands (entry_id)")
+    return conn
+
+
+def _valid(signature):
+    return (
+        isinstance(signature, list) and len(signature) == NUM_PERMUTATIONS
+        and all(isinstance(value, int) and 0 <= value < HASH_PRIME for value in signature)
+    )
+
+
+def _inputs_key(inputs):
+    """Canonical form of the analysis-input fingerprints, or None if any is missing"""
+    if not inputs or any(value is None for value in inputs.values()):
+        return None
+    return json.dumps(inputs, sort_keys=True)
+
+
+def find_near_duplicate(signature, scope, inputs, threshold=THRESHOLD):
+    """
+    Look up the most similar stored analysis in the same scope.
+
+    Similarity alone cannot tell a changed date from an added skill, so the
+    stored entry must also have been analyzed from exactly the same inputs.
+
+    Args:
+        signature: minhash_signature() of the resume being analyzed
+        scope: Key the stored analysis must share (user, job description and depth)
+        inputs: Fingerprints of the fields the analysis reads, e.g. {'skills': ...}
+        threshold: Minimum estimated similarity to count as a near-duplicate
+
+    Returns:
+        (analysis, similarity) for the best match at or above the threshold,
+        or (None, None)
+    """
+    inputs_key = _inputs_key(inputs)
+    if not _valid(signature) or inputs_key is None:
+        return None, None
+    try:
+        conn = _connect()
+    except sqlite3.Error as e:
+        print(f"WARNING: Near-duplicate index unavailable: {e}", file=sys.stderr)
+        return None, None
+    try:
+        candidates = set()
+        for band, band_hash in enumerate(_band_hashes(signature)):
+            rows = conn.execute("SELECT entry_id FROM bands WHERE scope = ? AND band = ? AND hash = ?", (scope, band, band_hash))
+            candidates.update(row[0] for row in rows)
+
+        best, best_similarity = None, None
+        for entry_id in candidates:
+            row = conn.execute("SELECT signature, analysis FROM entries WHERE id = ? AND inputs = ?", (entry_id, inputs_key)).fetchone()
+            if row is None:
+                continue
+            similarity = estimate_similarity(signature, json.loads(row[0]))
+            if similarity >= threshold and (best_similarity is None or similarity > best_similarity):
+                best, best_similarity = row[1], similarity
+        return (json.loads(best), best_similarity) if best else (None, None)
+    except sqlite3.Error as e:
+        print(f"WARNING: Near-duplicate lookup failed: {e}", file=sys.stderr)
+        return None, None
+    finally:
+        conn.close()
+
+
+def store_analysis(signature, scope, inputs, analysis):
+    """Index a freshly generated analysis under its signature and inputs; errors, degraded and reused results are skipped"""
+    inputs_key = _inputs_key(inputs)
+    if not _valid(signature) or inputs_key is None or any(analysis.get(key) for key in ('error', 'degraded', 'cancelled', 'reused')):
+        return
+    stored = {key: value for key, value in analysis.items() if key not in PROVENANCE_FIELDS}
+    try:
+        conn = _connect()
+    except sqlite3.Error as e:
+        print(f"WARNING: Near-duplicate index unavailable: {e}", file=sys.stderr)
+        return
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        entry_id = conn.execute(
+            "INSERT INTO entries (scope, signature, analysis, created, inputs) VALUES (?, ?, ?, ?, ?)",
+            (scope, json.dumps(signature), json.dumps(stored), time.time(), inputs_key)
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO bands (scope, band, hash, entry_id) VALUES (?, ?, ?, ?)",
+            [(scope, band, band_hash, entry_id) for band, band_hash in enumerate(_band_hashes(signature))]
+        )
+        # Keep the index bounded by dropping the oldest entries
+        conn.execute("DELETE FROM bands WHERE entry_id <= ?", (entry_id - MAX_ENTRIES,))
+        conn.execute("DELETE FROM entries WHERE id <= ?", (entry_id - MAX_ENTRIES,))
+        conn.execute("COMMIT")
+    except sqlite3.Error as e:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        print(f"WARNING: Could not store analysis for near-duplicate reuse: {e}", file=sys.stderr)
+    finally:
+        conn.close()
@@ -0,0 +1,154 @@
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+from cancellation import check
+
+# Token buckets shared by every service process through one SQLite file
+RATE_LIMIT_DB_PATH = os.getenv(
+    'RATE_LIMIT_DB_PATH',
+    os.path.join(tempfile.gettempdir(), 's3dashboard_rate_limit.sqlite3')
+)
+
+# Gemini quota per model (requests and tokens per minute); 0 disables a limit.
+# Buckets are filled to QUOTA_HEADROOM of the quota to stay just under it.
+REQUESTS_PER_MINUTE = float(os.getenv('GEMINI_RPM', '15'))
+TOKENS_PER_MINUTE = float(os.getenv('GEMINI_TPM', '1000000'))
+QUOTA_HEADROOM = 0.9
+
+# Output tokens reserved per request on top of the prompt estimate
+RESERVED_OUTPUT_TOKENS = 1024
+
+POLL_INTERVAL = 0.1
+# Waiters that have not polled for this long (e.g. killed processes) lose their place
+STALE_WAITER_SECONDS = 10
+
+
+class RateLimitTimeout(Exception):
+    """Raised when quota does not become available within the caller's timeout"""
+
+
+def estimate_tokens(prompt):
+    """Rough token count for a prompt plus its expected response"""
+    return len(prompt) // 4 + RESERVED_OUTPUT_TOKENS
+
+
+def _connect():
+    conn = sqlite3.connect(RATE_LIMIT_DB_PATH, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, requests REAL, tokens REAL, updated REAL)")
+    conn.execute("CREATE TABLE IF NOT EXISTS waiters (id INTEGER PRIMARY KEY AUTOINCREMENT, bucket TEXT, heartbeat REAL)")
+    return conn
+
+
+def _refill(conn, bucket, now):
+    """Return the bucket's (requests, tokens) after refilling for elapsed time"""
+    request_capacity = REQUESTS_PER_MINUTE * QUOTA_HEADROOM
+    token_capacity = TOKENS_PER_MINUTE * QUOTA_HEADROOM
+    row = conn.execute("SELECT requests, tokens, updated FROM buckets WHERE name = ?", (bucket,)).fetchone()
+    if row is None:
+        return request_capacity, token_capacity
+    requests, tokens, updated = row
+    elapsed = max(0.0, now - updated)
+    return (
+        min(request_capacity, requests + elapsed * request_capacity / 60),
+        min(token_capacity, tokens + elapsed * token_capacity / 60)
+    )
+
+
+def acquire(bucket, tokens, timeout=None, cancel_token=None):
+    """
+    Block until one request and `tokens` tokens are available in `bucket`
+    (normally the model name), then consume them.
+
+    Callers across all processes are served first-come first-served: each
+    takes a ticket and only the oldest live ticket may draw from the bucket.
+    Raises RateLimitTimeout if that takes longer than `timeout` seconds, and
+    OperationCancelled if cancel_token is cancelled while waiting. If the
+    shared store itself fails, the call is let through unmetered.
+    """
+    if REQUESTS_PER_MINUTE <= 0 and TOKENS_PER_MINUTE <= 0:
+        return
+
+    # A single request can never need more than a full bucket
+    if TOKENS_PER_MINUTE > 0:
+        tokens = min(tokens, TOKENS_PER_MINUTE * QUOTA_HEADROOM)
+    deadline = time.monotonic() + timeout if timeout is not None else None
+
+    try:
+        conn = _connect()
+    except sqlite3.Error as e:
+        print(f"WARNING: Rate limiter unavailable, not metering this call: {e}", file=sys.stderr)
+        return
+    ticket = None
+    try:
+        ticket = conn.execute(
+            "INSERT INTO waiters (bucket, heartbeat) VALUES (?, ?)", (bucket, time.time())
+        ).lastrowid
+
+        while True:
+            check(cancel_token)
+            now = time.time()
+            wait = POLL_INTERVAL
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM waiters WHERE heartbeat < ? AND id != ?", (now - STALE_WAITER_SECONDS, ticket))
+                if conn.execute("UPDATE waiters SET heartbeat = ? WHERE id = ?", (now, ticket)).rowcount == 0:
+                    # Our ticket was reaped as stale (e.g. after a long pause); rejoin the queue
+                    ticket = conn.execute(
+                        "INSERT INTO waiters (bucket, heartbeat) VALUES (?, ?)", (bucket, now)
+                    ).lastrowid
+                head = conn.execute("SELECT MIN(id) FROM waiters WHERE bucket = ?", (bucket,)).fetchone()[0]
+
+                if head == ticket:
+                    requests, available = _refill(conn, bucket, now)
+                    have_request = REQUESTS_PER_MINUTE <= 0 or requests >= 1
+                    have_tokens = TOKENS_PER_MINUTE <= 0 or available >= tokens
+                    if have_request and have_tokens:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO buckets (name, requests, tokens, updated) VALUES (?, ?, ?, ?)",
+                            (bucket, requests - 1, available - tokens, now)
+                        )
+                        conn.execute("DELETE FROM waiters WHERE id = ?", (ticket,))
+                        conn.execute("COMMIT")
+                        return
+
+                    # Sleep until the scarcer resource has refilled enough
+                    if not have_request:
+                        wait = max(wait, (1 - requests) * 60 / (REQUESTS_PER_MINUTE * QUOTA_HEADROOM))
+                    if not have_tokens:
+                        wait = max(wait, (tokens - available) * 60 / (TOKENS_PER_MINUTE * QUOTA_HEADROOM))
+                    wait = min(wait, STALE_WAITER_SECONDS / 2)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RateLimitTimeout(f"Gemini quota for {bucket} not available within {timeout:.1f}s")
+                wait = min(wait, remaining)
+            if cancel_token is not None:
+                wait = min(wait, POLL_INTERVAL)
+            time.sleep(wait)
+    except sqlite3.Error as e:
+        # A broken shared store (unwritable path, locked for too long) must not
+        # block every model call: fail open and let Gemini's own quota errors apply
+        _leave_queue(conn, ticket)
+        print(f"WARNING: Rate limiter unavailable, not metering this call: {e}", file=sys.stderr)
+    except BaseException:
+        # Give up our place in the queue (e.g. on timeout or cancellation)
+        _leave_queue(conn, ticket)
+        raise
+    finally:
+        conn.close()
+
+
+def _leave_queue(conn, ticket):
+    if ticket is not None:
+        try:
+            conn.execute("DELETE FROM waiters WHERE id = ?", (ticket,))
+        except sqlite3.Error:
+            pass
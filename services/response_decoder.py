@@ -0,0 +1,313 @@
+import re
+import json
+
+# Literal spellings models sometimes emit instead of JSON ones
+LITERALS = {
+    'true': 'true', 'True': 'true',
+    'false': 'false', 'False': 'false',
+    'null': 'null', 'None': 'null', 'undefined': 'null',
+}
+
+# Start positions ('{' or '[') tried before giving up on a response
+MAX_START_CANDIDATES = 20
+
+NUMBER_PATTERN = re.compile(r'-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?%?')
+WORD_PATTERN = re.compile(r'\w+')
+CLOSERS = {'{': '}', '[': ']'}
+
+
+class ResponseDecodeError(ValueError):
+    """Raised when no usable JSON payload can be recovered from a model response"""
+
+
+def _strip_trailing_comma(out):
+    """Drop a dangling comma (and whitespace) from the end of the output buffer"""
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ',':
+        out.pop()
+
+
+def repair_json(text, start=None):
+    """
+    Repair the JSON object or array at `start` (default: the first '{' or '[')
+    in `text` in one pass.
+
+    Handles preamble and trailing commentary, markdown fences, trailing
+    commas, missing commas between values, single-quoted or smart-quoted
+    strings, raw newlines inside strings, Python/JS literals, percentages
+    and output truncated mid-value (open strings and brackets are closed).
+    """
+    if start is None:
+        start = min((i for i in (text.find('{'), text.find('[')) if i != -1), default=-1)
+    if start == -1:
+        raise ResponseDecodeError("No JSON object found in model response")
+
+    out, stack = [], []
+    quote = None           # quote character of the string being read, if any
+    value_ended = False    # a complete value/key was just emitted
+    last_structural = None # last of { [ , : seen, to spot a dangling key at the end
+    i = start
+
+    while i < len(text):
+        char = text[i]
+
+        if quote:
+            if char == '\\' and i + 1 < len(text):
+                # \' is only valid inside single-quoted strings, which become double-quoted
+                out.append("'" if text[i + 1] == "'" else text[i:i + 2])
+                i += 2
+                continue
+            if char == quote or (quote == '“' and char == '”'):
+                out.append('"')
+                quote, value_ended = None, True
+            elif char == '"':
+                out.append('\\"')
+            elif char == '\n':
+                out.append('\\n')
+            elif char in '\r\t':
+                out.append('\\r' if char == '\r' else '\\t')
+            else:
+                out.append(char)
+            i += 1
+            continue
+
+        if char.isspace():
+            out.append(char)
+            i += 1
+            continue
+
+        starts_value = char in '"\'“{[-' or char.isalnum()
+        if starts_value and value_ended:
+            out.append(',')
+        value_ended = False
+
+        if char in '"\'“':
+            quote = char
+            out.append('"')
+        elif char in '{[':
+            stack.append(char)
+            out.append(char)
+            last_structural = char
+        elif char in '}]':
+            _strip_trailing_comma(out)
+            if stack and CLOSERS[stack[-1]] == char:
+                stack.pop()
+                out.append(char)
+            value_ended = True
+            if not stack:
+                break
+        elif char in ',:':
+            out.append(char)
+            last_structural = char
+        elif char == '-' or char.isdigit():
+            match = NUMBER_PATTERN.match(text, i)
+            token = match.group(0) if match else char
+            out.append(token.rstrip('%'))
+            i += len(token)
+            value_ended = True
+            continue
+        elif char.isalpha() or char == '_':  # isalnum() digits are handled above
+            word = WORD_PATTERN.match(text, i).group(0)
+            # Bare words other than literals are unquoted keys or strings
+            out.append(LITERALS.get(word) or json.dumps(word))
+            value_ended = True
+            i += len(word)
+            continue
+        # Anything else (stray fence characters, comments) is dropped
+        i += 1
+
+    # Truncated output: close the open string, drop a dangling key or comma,
+    # then close every open bracket
+    if quote:
+        out.append('"')
+        value_ended = True
+    if stack:
+        _strip_trailing_comma(out)
+        if out and out[-1] == ':':
+            out.append('null')
+        elif stack[-1] == '{' and value_ended and last_structural in ('{', ','):
+            out.append(': null')
+        for opener in reversed(stack):
+            _strip_trailing_comma(out)
+            out.append(CLOSERS[opener])
+
+    return ''.join(out)
+
+
+def _fits(value, schema):
+    try:
+        validate(value, schema)
+    except ResponseDecodeError:
+        return False
+    return True
+
+
+def decode_json(text, schema=None):
+    """
+    Parse a model response into JSON, repairing it if a plain parse fails.
+
+    Each '{' or '[' is tried in turn as the start of the payload, so that
+    bracketed preamble such as "Here is my analysis [strict mode]:" is
+    skipped. Without a schema the first candidate that can be repaired is
+    returned. With one, the first candidate that validates against it wins;
+    if none does, the first repaired object, then the first repaired value.
+    """
+    text = (text or '').strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    starts = [i for i, char in enumerate(text) if char in '{['][:MAX_START_CANDIDATES]
+    if not starts:
+        raise ResponseDecodeError("No JSON object found in model response")
+    first_value = first_object = error = None
+    for start in starts:
+        try:
+            value = json.loads(repair_json(text, start))
+        except ValueError as e:
+            error = error or e
+            continue
+        if schema is None or _fits(value, schema):
+            return value
+        if first_value is None:
+            first_value = value
+        if first_object is None and isinstance(value, dict):
+            first_object = value
+    if first_object is not None:
+        return first_object
+    if first_value is not None:
+        return first_value
+    raise ResponseDecodeError(f"Could not repair model JSON: {str(error)}") from error
+
+
+def _coerce(value, spec, path):
+    """Coerce one value to its spec, raising ResponseDecodeError if that is impossible"""
+    expected = spec['type']
+
+    if expected in (int, float):
+        if isinstance(value, str):
+            value = value.strip().rstrip('%')
+        try:
+            value = expected(round(float(value))) if expected is int else float(value)
+        except (TypeError, ValueError):
+            raise ResponseDecodeError(f"'{path}' is not a number")
+        low, high = spec.get('range', (None, None))
+        if low is not None:
+            value = max(low, min(high, value))
+        return value
+
+    if expected is list:
+        if isinstance(value, (str, dict)):
+            value = [value]
+        if not isinstance(value, list):
+            raise ResponseDecodeError(f"'{path}' is not a list")
+        return value
+
+    if expected is dict:
+        if not isinstance(value, dict):
+            raise ResponseDecodeError(f"'{path}' is not an object")
+        return validate(value, spec['fields'], path) if 'fields' in spec else value
+
+    if not isinstance(value, expected):
+        raise ResponseDecodeError(f"'{path}' has the wrong type")
+    return value
+
+
+def validate(data, schema, path=''):
+    """
+    Validate and normalize decoded model output against a schema.
+
+    A schema maps field names to specs: {'type': ..., 'default': ...,
+    'range': (low, high), 'fields': {...nested schema...}}. Numbers are
+    coerced and clamped, a lone item becomes a one-item list, and bad or
+    missing fields get their default. Fields without a default are required.
+    Unknown fields are kept as-is.
+    """
+    if not isinstance(data, dict):
+        raise ResponseDecodeError(f"Expected a JSON object{f' at {path}' if path else ''}")
+
+    result = dict(data)
+    for name, spec in schema.items():
+        field_path = f"{path}.{name}" if path else name
+        if name in data and data[name] is not None:
+            try:
+                result[name] = _coerce(data[name], spec, field_path)
+                continue
+            except ResponseDecodeError:
+                if 'default' not in spec:
+                    raise
+        elif 'default' not in spec:
+            raise ResponseDecodeError(f"Missing required field '{field_path}'")
+        default = spec['default']
+        default = default() if callable(default) else default
+        if isinstance(default, dict) and 'fields' in spec:
+            # A defaulted object still gets its own field defaults
+            default = validate(default, spec['fields'], field_path)
+        result[name] = default
+    return result
+
+
+SCORE = {'type': int, 'range': (0, 100)}
+
+SCORE_BREAKDOWN_FIELDS = {
+    key: {**SCORE, 'default': 0}
+    for key in ('content_quality', 'ats_optimization', 'skills_relevance', 'experience_presentation', 'formatting')
+}
+
+# Output of resume_ai_analyzer.analyze_resume_with_ai
+ANALYSIS_SCHEMA = {
+    'overall_score': SCORE,
+    'score_breakdown': {'type': dict, 'default': dict, 'fields': SCORE_BREAKDOWN_FIELDS},
+    'strengths': {'type': list, 'default': list},
+    'weaknesses': {'type': list, 'default': list},
+    'suggestions': {'type': list, 'default': list},
+    'missing_skills': {'type': list, 'default': list},
+    'ats_issues': {'type': list, 'default': list},
+    'keyword_recommendations': {'type': list, 'default': list},
+    'action_items': {'type': list, 'default': list},
+}
+
+# One entry of a bulk_scoring batch response
+BATCH_ITEM_SCHEMA = {
+    'id': {'type': str},
+    'overall_score': SCORE,
+    'score_breakdown': {'type': dict, 'fields': {key: SCORE for key in SCORE_BREAKDOWN_FIELDS}},
+    'strengths': {'type': list, 'default': list},
+    'weaknesses': {'type': list, 'default': list},
+}
+
+# Output of resume_improvement_ai.generate_improvement_suggestions; derived
+# fields left as None here (overall_score, improvement_potential,
+# suggestions) are filled in there
+IMPROVEMENT_SCHEMA = {
+    'overall_score': {**SCORE, 'default': None},
+    'improvement_potential': {'type': int, 'range': (0, 100), 'default': None},
+    'suggestions': {'type': list, 'default': None},
+    'scores': {'type': dict, 'default': dict, 'fields': {
+        'overall_structure': {'type': int, 'range': (0, 20), 'default': None},
+        'skill_relevance': {'type': int, 'range': (0, 40), 'default': None},
+        'readability': {'type': int, 'range': (0, 20), 'default': None},
+        'ats_compatibility': {'type': int, 'range': (0, 20), 'default': None},
+        'total': {'type': int, 'range': (0, 100), 'default': None},
+    }},
+    'critical_improvements': {'type': list, 'default': list},
+    'skills_recommendations': {'type': dict, 'default': dict, 'fields': {
+        'trending_skills': {'type': list, 'default': list},
+        'missing_keywords': {'type': list, 'default': list},
+        'skills_to_highlight': {'type': list, 'default': list},
+    }},
+    'content_improvements': {'type': dict, 'default': dict, 'fields': {
+        'experience': {'type': list, 'default': list},
+        'format': {'type': list, 'default': list},
+        'summary': {'type': list, 'default': list},
+    }},
+    'ats_optimization_tips': {'type': list, 'default': list},
+    'next_steps': {'type': list, 'default': list},
+    'industry_insights': {'type': dict, 'default': dict, 'fields': {
+        'current_trends': {'type': list, 'default': list},
+        'recruiter_preferences': {'type': list, 'default': list},
+        'common_mistakes': {'type': list, 'default': list},
+    }},
+}
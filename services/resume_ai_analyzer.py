@@ -1,26 +1,120 @@
 import sys
 import json
 import os
+import time
+from cancellation import OperationCancelled, token_from_environment
+from gemini_client import DeadlineExceeded, generate_text
+from model_router import choose_model
+from near_duplicate import find_near_duplicate, store_analysis
+from response_decoder import ANALYSIS_SCHEMA, ResponseDecodeError, decode_json, validate
+from section_fingerprints import ANALYSIS_DEPENDENCIES, fingerprint_text, reusable_result
 
-# Try to import Google Generative AI
-try:
-    import google.generativeai as genai
-except ImportError:
-    print(json.dumps({"error": "google-generativeai not installed. Run: pip install google-generativeai"}))
-    sys.exit(1)
+# Reviewer persona and scoring rubric shared by the single and batch (bulk_scoring) prompts
+REVIEWER_INSTRUCTIONS = """You are a HIGHLY CRITICAL professional resume reviewer with 15+ years of experience. You have seen thousands of resumes and have VERY HIGH STANDARDS. Most resumes you review score between 40-70%. Only exceptional resumes score above 80%.
 
-def analyze_resume_with_ai(resume_data, job_description=None):
+**CRITICAL INSTRUCTIONS:**
+- Be BRUTALLY HONEST and REALISTIC in your assessment
+- DO NOT be generous with scores - most resumes have significant flaws
+- ONLY extract and reference skills that are EXPLICITLY listed in the Skills section
+- If the resume is weak, say so directly with a low score (30-50%)
+- If the resume is average, give it 50-65%
+- Only excellent, well-crafted resumes should get 70%+
+- A perfect 90-100% resume is EXTREMELY rare"""
+
+SCORING_GUIDELINES = """**SCORING GUIDELINES (FOLLOW STRICTLY):**
+- 0-30%: Severely flawed, missing critical sections
+- 31-50%: Below average, needs major improvements
+- 51-65%: Average resume with notable gaps
+- 66-75%: Good resume with minor improvements needed
+- 76-85%: Very good, professional resume
+- 86-95%: Excellent, standout resume
+- 96-100%: Perfect (extremely rare)
+
+**Remember:** Be CRITICAL, HONEST, and HELPFUL. A realistic low score with actionable feedback is more valuable than false praise."""
+
+# Fingerprints a near-duplicate's analysis must share: the analysis quotes these
+# fields, so only edits outside them (contact details, summary wording) reuse it
+NEAR_DUPLICATE_INPUTS = ('skills', 'experience', 'education')
+
+def reusable_analysis(previous_result, resume_data, job_description=None, previous_fingerprints=None):
+    """
+    Work out how much of a previous analysis can be reused for an edited resume.
+    
+    Returns:
+        (previous_analysis, stale) where previous_analysis is None if it cannot be
+        reused at all, and stale is the set of analysis inputs that changed.
+    """
+    if not previous_result or 'overall_score' not in previous_result:
+        return None, set(ANALYSIS_DEPENDENCIES)
+    if previous_result.get('method') == 'basic_calculation':
+        return None, set(ANALYSIS_DEPENDENCIES)
+    
+    job_fingerprint = fingerprint_text(job_description) if job_description else None
+    if previous_result.get('job_description_fingerprint') != job_fingerprint:
+        return None, set(ANALYSIS_DEPENDENCIES)
+    
+    return reusable_result(previous_result, resume_data.get('fingerprints'), ANALYSIS_DEPENDENCIES, previous_fingerprints)
+
+def degraded_analysis(resume_data, previous_result, reason):
+    """
+    Result returned when the latency budget runs out: the last cached analysis
+    if one is available, otherwise the basic score, marked as degraded.
+    """
+    if previous_result and 'error' not in previous_result and 'overall_score' in previous_result:
+        result = dict(previous_result)
+    else:
+        result = calculate_basic_score(resume_data)
+    return {**result, "degraded": True, "degraded_reason": reason}
+
+def analyze_resume_with_ai(resume_data, job_description=None, previous_result=None, previous_fingerprints=None,
+                           budget_seconds=None, depth='standard', cancel_token=None, owner=None):
     """
     Analyze resume using Gemini AI and provide detailed feedback
     
     Args:
         resume_data: Dict containing parsed resume data (skills, experience, education, etc.)
         job_description: Optional job description to match against
+        previous_result: Optional earlier analysis of an edited version of this resume.
+            If none of the analyzed sections changed it is returned as-is; otherwise
+            the model only revises the parts affected by the changed sections.
+            Without a usable one, the owner's analysis of a near-duplicate resume
+            (per the 'minhash' signature, see near_duplicate) is reused when it was
+            made from the same skills, experience and education.
+        previous_fingerprints: Section fingerprints the previous result was computed
+            from (defaults to previous_result['fingerprints'])
+        budget_seconds: Optional latency budget. A slow model call is hedged with a
+            duplicate request, and once the budget is spent a degraded result
+            (see degraded_analysis) is returned instead of waiting further.
+        depth: 'quick', 'standard' or 'deep'; selects the model tier (see model_router)
+        cancel_token: Optional CancellationToken; a cancelled analysis stops waiting
+            on the model and returns {"cancelled": true, ...}
+        owner: ID of the user the resume belongs to. Near-duplicate reuse only
+            happens within one owner's analyses, and not at all without one.
     
     Returns:
         Dict with AI-generated suggestions and scoring
     """
     
+    started = time.monotonic()
+    previous_analysis, stale = reusable_analysis(previous_result, resume_data, job_description, previous_fingerprints)
+    provenance = {
+        "fingerprints": resume_data.get('fingerprints'),
+        "job_description_fingerprint": fingerprint_text(job_description) if job_description else None
+    }
+    if previous_analysis and not stale:
+        return {**previous_analysis, **provenance, "reused": True, "regenerated_sections": []}
+    
+    # A near-identical resume (e.g. only contact details changed) was analyzed before
+    scope = f"{owner}:{provenance['job_description_fingerprint'] or ''}:{depth}" if owner else None
+    fingerprints = resume_data.get('fingerprints') or {}
+    inputs = {field: fingerprints.get(field) for field in NEAR_DUPLICATE_INPUTS}
+    duplicate, similarity = None, None
+    if scope and previous_analysis is None:
+        duplicate, similarity = find_near_duplicate(resume_data.get('minhash'), scope, inputs)
+    if duplicate:
+        print(f"INFO: Reusing analysis of a near-duplicate resume (similarity {similarity:.2f})", file=sys.stderr)
+        return {**duplicate, **provenance, "reused": True, "near_duplicate": True, "similarity": round(similarity, 3)}
+    
     # Get API key from environment
     api_key = os.getenv('GEMINI_API_KEY')
     if not api_key:
@@ -30,12 +124,22 @@ def analyze_resume_with_ai(resume_data, job_description=None):
             "score_breakdown": {}
         }
     
+    # Imported here so fallback-only scoring never pays for the SDK import
+    try:
+        import google.generativeai as genai
+    except ImportError:
+        return {
+            "error": "google-generativeai not installed. Run: pip install google-generativeai",
+            "suggestions": [],
+            "score_breakdown": {}
+        }
+    
     try:
         # Configure Gemini
         genai.configure(api_key=api_key)
         
-        # Use Gemini 1.5 Flash - stable, reliable model
-        model = genai.GenerativeModel('models/gemini-1.5-flash')
+        # Route to a model tier based on input size, depth and recent model health
+        model = genai.GenerativeModel(choose_model(resume_data, job_description, depth, budget_seconds))
         
         # Prepare resume summary
         resume_summary = f"""
@@ -51,16 +155,7 @@ WORD COUNT: {resume_data.get('word_count', 0)}
 """
         
         # Create STRICT, CRITICAL prompt for realistic AI analysis
-        prompt = f"""You are a HIGHLY CRITICAL professional resume reviewer with 15+ years of experience. You have seen thousands of resumes and have VERY HIGH STANDARDS. Most resumes you review score between 40-70%. Only exceptional resumes score above 80%.
-
-**CRITICAL INSTRUCTIONS:**
-- Be BRUTALLY HONEST and REALISTIC in your assessment
-- DO NOT be generous with scores - most resumes have significant flaws
-- ONLY extract and reference skills that are EXPLICITLY listed in the Skills section
-- If the resume is weak, say so directly with a low score (30-50%)
-- If the resume is average, give it 50-65%
-- Only excellent, well-crafted resumes should get 70%+
-- A perfect 90-100% resume is EXTREMELY rare
+        prompt = f"""{REVIEWER_INSTRUCTIONS}
 
 {resume_summary}
 
@@ -105,41 +200,46 @@ Provide a comprehensive, HONEST analysis in JSON format:
   ]
 }}
 
-**SCORING GUIDELINES (FOLLOW STRICTLY):**
-- 0-30%: Severely flawed, missing critical sections
-- 31-50%: Below average, needs major improvements
-- 51-65%: Average resume with notable gaps
-- 66-75%: Good resume with minor improvements needed
-- 76-85%: Very good, professional resume
-- 86-95%: Excellent, standout resume
-- 96-100%: Perfect (extremely rare)
-
-**Remember:** Be CRITICAL, HONEST, and HELPFUL. A realistic low score with actionable feedback is more valuable than false praise.
+{SCORING_GUIDELINES}
 
 Provide ONLY the JSON response, no additional text."""
 
+        if previous_analysis:
+            previous_json = json.dumps({
+                key: value for key, value in previous_analysis.items()
+                if key not in ('fingerprints', 'job_description_fingerprint', 'reused', 'regenerated_sections', 'degraded', 'degraded_reason')
+            })
+            prompt += f"""
+
+**INCREMENTAL UPDATE:**
+This resume was analyzed before. Only these sections changed since then: {', '.join(sorted(stale)).upper()}.
+Previous analysis:
+{previous_json}
+
+Keep every field of the previous analysis that is not affected by the changed sections exactly as it is.
+Revise only the scores, findings and suggestions that depend on the changed sections, and return the
+complete updated analysis in the same JSON format."""
+
         # Generate AI response
-        response = model.generate_content(prompt)
+        remaining = budget_seconds - (time.monotonic() - started) if budget_seconds is not None else None
+        response_text = generate_text(model, prompt, remaining, cancel_token)
         
-        # Parse JSON from response
-        response_text = response.text.strip()
+        # Locate and repair the JSON payload, then validate it and fill defaults
+        ai_analysis = decode_json(response_text, ANALYSIS_SCHEMA)
+        if previous_analysis and isinstance(ai_analysis, dict):
+            ai_analysis = {**previous_analysis, **ai_analysis, "reused": False, "regenerated_sections": sorted(stale)}
+        ai_analysis = validate(ai_analysis, ANALYSIS_SCHEMA)
         
-        # Remove markdown code blocks if present
-        if response_text.startswith('```json'):
-            response_text = response_text[7:]
-        if response_text.startswith('```'):
-            response_text = response_text[3:]
-        if response_text.endswith('```'):
-            response_text = response_text[:-3]
+        result = {**ai_analysis, **provenance}
+        if scope:
+            store_analysis(resume_data.get('minhash'), scope, inputs, result)
+        return result
         
-        response_text = response_text.strip()
-        
-        # Parse JSON
-        ai_analysis = json.loads(response_text)
-        
-        return ai_analysis
-        
-    except json.JSONDecodeError as e:
+    except DeadlineExceeded as e:
+        return degraded_analysis(resume_data, previous_result, str(e))
+    except OperationCancelled as e:
+        return {"error": f"Analysis cancelled: {e}", "cancelled": True}
+    except ResponseDecodeError as e:
         return {
             "error": f"Failed to parse AI response: {str(e)}",
             "raw_response": response_text if 'response_text' in locals() else None,
@@ -256,6 +356,26 @@ def calculate_basic_score(resume_data):
         "note": "This is a fallback score. AI analysis unavailable."
     }
 
+def with_basic_fallback(ai_result, resume_data):
+    """
+    Return ai_result, or basic scoring if the AI analysis failed (but was not cancelled)
+    """
+    if ai_result.get('cancelled') or 'error' not in ai_result or 'overall_score' in ai_result:
+        return ai_result
+    basic_result = calculate_basic_score(resume_data)
+    return {
+        **basic_result,
+        "ai_error": ai_result.get('error'),
+        "suggestions": [
+            {
+                "category": "General",
+                "priority": "high",
+                "suggestion": "AI analysis unavailable. Using basic scoring.",
+                "reason": ai_result.get('error', 'Unknown error')
+            }
+        ]
+    }
+
 def main():
     """
     Main function to handle command line arguments
@@ -268,29 +388,22 @@ def main():
         # Parse resume data from command line argument
         resume_data = json.loads(sys.argv[1])
         
-        # Get optional job description
-        job_description = sys.argv[2] if len(sys.argv) > 2 else None
+        # Get optional job description and previous analysis
+        job_description = sys.argv[2] if len(sys.argv) > 2 and sys.argv[2] else None
+        previous_result = json.loads(sys.argv[3]) if len(sys.argv) > 3 else None
+        
+        # Optional latency budget for the whole analysis
+        budget = os.getenv('LLM_BUDGET_SECONDS')
+        budget_seconds = float(budget) if budget else None
         
         # Try AI analysis first
-        ai_result = analyze_resume_with_ai(resume_data, job_description)
+        ai_result = analyze_resume_with_ai(
+            resume_data, job_description, previous_result,
+            budget_seconds=budget_seconds, depth=os.getenv('ANALYSIS_DEPTH', 'standard'),
+            cancel_token=token_from_environment(), owner=os.getenv('ANALYSIS_OWNER') or None
+        )
         
-        # If AI analysis failed, use basic scoring
-        if 'error' in ai_result and 'overall_score' not in ai_result:
-            basic_result = calculate_basic_score(resume_data)
-            result = {
-                **basic_result,
-                "ai_error": ai_result.get('error'),
-                "suggestions": [
-                    {
-                        "category": "General",
-                        "priority": "high",
-                        "suggestion": "AI analysis unavailable. Using basic scoring.",
-                        "reason": ai_result.get('error', 'Unknown error')
-                    }
-                ]
-            }
-        else:
-            result = ai_result
+        result = with_basic_fallback(ai_result, resume_data)
         
         # Output result as JSON
         print(json.dumps(result, indent=2))
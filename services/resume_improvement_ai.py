@@ -1,26 +1,73 @@
 import sys
 import json
 import os
+import time
+from cancellation import OperationCancelled, token_from_environment
+from gemini_client import DeadlineExceeded, generate_text
+from model_router import choose_model
+from response_decoder import IMPROVEMENT_SCHEMA, ResponseDecodeError, decode_json, validate
+from section_fingerprints import IMPROVEMENT_DEPENDENCIES, reusable_result
 
-try:
-    import google.generativeai as genai
-except ImportError:
-    print(json.dumps({"error": "google-generativeai not installed"}))
-    sys.exit(1)
+DEFAULT_SUGGESTIONS = [
+    {"title": "Clarify summary", "description": "Write a concise, metrics-driven summary."},
+    {"title": "Highlight relevant skills", "description": "Move key skills to a dedicated section."},
+    {"title": "Quantify achievements", "description": "Add metrics to experience bullets."}
+]
 
+# Fields computed from the rest of the output; recomputed, never carried over on an incremental update
+DERIVED_FIELDS = ('overall_score', 'improvement_potential', 'suggestions')
 
-def generate_improvement_suggestions(resume_data):
+
+def degraded_suggestions(resume_data, previous_result, reason):
+    """
+    Result returned when the latency budget runs out: the last cached
+    suggestions if available, otherwise generic ones, marked as degraded.
+    """
+    if previous_result and 'error' not in previous_result:
+        data = dict(previous_result)
+    else:
+        current_score = resume_data.get('current_score', 0)
+        data = {
+            "overall_score": current_score,
+            "improvement_potential": max(5, min(25, 100 - int(current_score))),
+            "suggestions": DEFAULT_SUGGESTIONS
+        }
+    return {**data, "degraded": True, "degraded_reason": reason}
+
+
+def generate_improvement_suggestions(resume_data, previous_result=None, previous_fingerprints=None, budget_seconds=None,
+                                     depth='standard', cancel_token=None):
     """
     Generate detailed resume improvement suggestions using Gemini AI
+    
+    If previous_result (an earlier output for an edited version of this resume)
+    is given, it is returned unchanged when skills, experience and education are
+    all unchanged, and otherwise only the affected suggestions are regenerated.
+    With budget_seconds, a slow model call is hedged and a degraded result is
+    returned once the budget is spent. depth ('quick', 'standard' or 'deep')
+    selects the model tier (see model_router). A cancelled cancel_token stops
+    the wait on the model.
     """
     
+    started = time.monotonic()
+    previous_data, stale = reusable_result(
+        previous_result, resume_data.get('fingerprints'), IMPROVEMENT_DEPENDENCIES, previous_fingerprints
+    )
+    if previous_data and not stale:
+        return {**previous_data, "fingerprints": resume_data.get('fingerprints'), "reused": True, "regenerated_sections": []}
+    
     api_key = os.getenv('GEMINI_API_KEY')
     if not api_key:
         return {"error": "GEMINI_API_KEY not found"}
     
+    try:
+        import google.generativeai as genai
+    except ImportError:
+        return {"error": "google-generativeai not installed"}
+    
     try:
         genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('models/gemini-1.5-flash')
+        model = genai.GenerativeModel(choose_model(resume_data, None, depth, budget_seconds))
         
         # Prepare resume context
         skills = ', '.join(resume_data.get('skills', [])[:30])
@@ -87,41 +134,54 @@ Rules:
 - Keep scores realistic; base on the provided content.
 """
 
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
-        
-        # Clean up response
-        if response_text.startswith('```json'):
-            response_text = response_text[7:]
-        if response_text.startswith('```'):
-            response_text = response_text[3:]
-        if response_text.endswith('```'):
-            response_text = response_text[:-3]
-        response_text = response_text.strip()
+        if previous_data:
+            previous_json = json.dumps({
+                key: value for key, value in previous_data.items()
+                if key not in ('fingerprints', 'reused', 'regenerated_sections')
+            }, ensure_ascii=False)
+            prompt += f"""
+Incremental update:
+These suggestions were generated before for an earlier version of this resume. Only these sections
+changed since then: {', '.join(sorted(stale))}.
+Previous output:
+{previous_json}
+
+Keep everything not affected by the changed sections as it is, revise only what depends on them,
+and return the complete updated JSON.
+"""
+
+        remaining = budget_seconds - (time.monotonic() - started) if budget_seconds is not None else None
+        response_text = generate_text(model, prompt, remaining, cancel_token)
         
-        # Parse and validate JSON
-        data = json.loads(response_text)
+        # Locate and repair the JSON payload, merge it over the previous output
+        # (derived fields are recomputed below), then validate and fill defaults
+        data = decode_json(response_text, IMPROVEMENT_SCHEMA)
+        if previous_data and isinstance(data, dict):
+            kept = {key: value for key, value in previous_data.items() if key not in DERIVED_FIELDS}
+            data = {**kept, **data, "reused": False, "regenerated_sections": sorted(stale)}
+        data = validate(data, IMPROVEMENT_SCHEMA)
         # Normalize and back-compat
         if 'scores' in data and isinstance(data['scores'], dict):
             total = data['scores'].get('total')
             if isinstance(total, int):
                 data['overall_score'] = total
-        if 'overall_score' not in data:
+        if data.get('overall_score') is None:
             data['overall_score'] = current_score
-        if 'improvement_potential' not in data:
+        if data.get('improvement_potential') is None:
             data['improvement_potential'] = max(5, min(25, 100 - int(data['overall_score'])))
         if 'suggestions' not in data or not isinstance(data['suggestions'], list):
             crit = data.get('critical_improvements', [])
             data['suggestions'] = [
                 {"title": c.get('title','Improve resume'), "description": c.get('description','Refine content for ATS and clarity')} for c in crit[:3]
-            ] or [
-                {"title": "Clarify summary", "description": "Write a concise, metrics-driven summary."},
-                {"title": "Highlight relevant skills", "description": "Move key skills to a dedicated section."},
-                {"title": "Quantify achievements", "description": "Add metrics to experience bullets."}
-            ]
+            ] or DEFAULT_SUGGESTIONS
+        data['fingerprints'] = resume_data.get('fingerprints')
         return data
         
-    except json.JSONDecodeError as e:
+    except DeadlineExceeded as e:
+        return degraded_suggestions(resume_data, previous_result, str(e))
+    except OperationCancelled as e:
+        return {"error": f"Generation cancelled: {e}", "cancelled": True}
+    except ResponseDecodeError as e:
         return {
             "error": f"JSON parsing error: {str(e)}",
             "raw_response": response_text[:500] if 'response_text' in locals() else "No response"
@@ -137,7 +197,12 @@ if __name__ == "__main__":
     
     try:
         resume_data = json.loads(sys.argv[1])
-        result = generate_improvement_suggestions(resume_data)
+        previous_result = json.loads(sys.argv[2]) if len(sys.argv) > 2 else None
+        budget = os.getenv('LLM_BUDGET_SECONDS')
+        result = generate_improvement_suggestions(
+            resume_data, previous_result, budget_seconds=float(budget) if budget else None,
+            depth=os.getenv('ANALYSIS_DEPTH', 'standard'), cancel_token=token_from_environment()
+        )
         print(json.dumps(result, ensure_ascii=False, indent=2))
     except json.JSONDecodeError:
         print(json.dumps({"error": "Invalid JSON input"}))
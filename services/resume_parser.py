@@ -1,92 +1,118 @@
+import os
 import sys
 import json
 import re
-import pdfplumber
-import docx2txt
-import spacy
 from pathlib import Path
+from cancellation import OperationCancelled, check, token_from_environment
+from document_guard import extract_text_guarded
+from near_duplicate import minhash_signature
+from section_fingerprints import fingerprint_lines, fingerprint_sections, stale_fields
 
-# Load English language model
-nlp = spacy.load("en_core_web_sm")
+# pdfplumber and docx2txt are imported on first use so that a parse only
+# pays for the library its file type needs
 
-def extract_text(file_path):
-    """Extract text from PDF or DOCX files"""
+def preload():
+    """Import every parsing dependency up front (used by long-lived workers)"""
+    import pdfplumber
+    import docx2txt
+
+# Comprehensive list of valid technical skills (for validation)
+VALID_SKILLS = {
+    # Programming Languages
+    'python', 'javascript', 'java', 'c++', 'c#', 'php', 'ruby', 'swift', 'kotlin', 'go', 'rust',
+    'typescript', 'scala', 'perl', 'r', 'matlab', 'dart', 'c', 'objective-c',
+    
+    # Frontend Technologies
+    'react', 'reactjs', 'react.js', 'angular', 'vue', 'vue.js', 'vuejs', 'svelte', 'ember',
+    'jquery', 'next.js', 'nextjs', 'nuxt', 'gatsby', 'html', 'html5', 'css', 'css3',
+    'sass', 'scss', 'less', 'tailwind', 'tailwindcss', 'bootstrap', 'material-ui', 'mui',
+    'webpack', 'vite', 'parcel', 'rollup', 'babel', 'redux', 'mobx', 'zustand',
+    
+    # Backend Technologies
+    'node.js', 'nodejs', 'node', 'express', 'expressjs', 'express.js', 'django', 'flask',
+    'fastapi', 'spring', 'spring boot', 'springboot', 'laravel', 'rails', 'ruby on rails',
+    'asp.net', '.net', 'dotnet', 'nestjs', 'fastify', 'koa', 'hapi',
+    
+    # Databases
+    'sql', 'mysql', 'postgresql', 'postgres', 'mongodb', 'redis', 'sqlite', 'mariadb',
+    'oracle', 'mssql', 'sql server', 'dynamodb', 'cassandra', 'couchdb', 'firebase',
+    'firestore', 'realm', 'nosql', 'elasticsearch', 'neo4j',
+    
+    # Cloud & DevOps
+    'aws', 'amazon web services', 'azure', 'gcp', 'google cloud', 'docker', 'kubernetes',
+    'k8s', 'jenkins', 'ci/cd', 'gitlab', 'github actions', 'travis ci', 'circleci',
+    'terraform', 'ansible', 'chef', 'puppet', 'vagrant', 'heroku', 'netlify', 'vercel',
+    
+    # Tools & Platforms
+    'git', 'github', 'gitlab', 'bitbucket', 'svn', 'mercurial', 'jira', 'confluence',
+    'slack', 'trello', 'asana', 'postman', 'insomnia', 'swagger', 'vscode', 'intellij',
+    'pycharm', 'webstorm', 'eclipse', 'visual studio', 'vim', 'emacs', 'sublime',
+    
+    # APIs & Protocols
+    'rest', 'restful', 'rest api', 'graphql', 'websocket', 'grpc', 'soap', 'json', 'xml',
+    'api', 'microservices', 'oauth', 'jwt', 'http', 'https', 'tcp/ip', 'websockets',
+    
+    # Testing
+    'jest', 'mocha', 'chai', 'jasmine', 'karma', 'cypress', 'selenium', 'puppeteer',
+    'playwright', 'junit', 'pytest', 'unittest', 'testng', 'rspec', 'enzyme',
+    
+    # Mobile Development
+    'react native', 'flutter', 'ios', 'android', 'xamarin', 'ionic', 'cordova',
+    'react-native', 'swift ui', 'swiftui', 'jetpack compose',
+    
+    # Data Science & AI
+    'machine learning', 'deep learning', 'artificial intelligence', 'ai', 'ml',
+    'data science', 'data analysis', 'pandas', 'numpy', 'scikit-learn', 'tensorflow',
+    'pytorch', 'keras', 'opencv', 'nlp', 'computer vision', 'data visualization',
+    
+    # Methodologies
+    'agile', 'scrum', 'kanban', 'waterfall', 'devops', 'tdd', 'bdd', 'ci/cd',
+    'continuous integration', 'continuous deployment',
+    
+    # Other Technical
+    'linux', 'unix', 'windows', 'macos', 'bash', 'powershell', 'shell scripting',
+    'regex', 'markdown', 'latex', 'nginx', 'apache', 'tomcat', 'iis',
+    'rabbitmq', 'kafka', 'activemq', 'memcached', 'varnish', 'prometheus', 'grafana'
+}
+
+
+# Word-boundary patterns for each skill, compiled once at import so forked
+# parser workers share them (see resume_parser_pool)
+SKILL_PATTERNS = {skill: re.compile(r'\b' + re.escape(skill) + r'\b') for skill in VALID_SKILLS}
+
+def extract_text(file_path, cancel_token=None, max_pages=None, stats=None):
+    """
+    Extract text from PDF or DOCX files, checking cancel_token between PDF pages.
+    max_pages limits how many PDF pages are read; for PDFs, an optional stats
+    dict is filled with the document's 'pages' and the 'pages_read'.
+    """
     file_path = Path(file_path)
     try:
         if file_path.suffix.lower() == '.pdf':
+            import pdfplumber
+            pages = []
             with pdfplumber.open(file_path) as pdf:
-                return " ".join(page.extract_text() for page in pdf.pages if page.extract_text())
+                selected = pdf.pages[:max_pages]
+                if stats is not None:
+                    stats.update({"pages": len(pdf.pages), "pages_read": len(selected)})
+                for page in selected:
+                    check(cancel_token)
+                    page_text = page.extract_text()
+                    if page_text:
+                        pages.append(page_text)
+            return " ".join(pages)
         elif file_path.suffix.lower() in ['.docx', '.doc']:
+            import docx2txt
             return docx2txt.process(file_path)
         else:
             raise ValueError("Unsupported file format. Please upload a PDF or DOCX file.")
+    except (OperationCancelled, MemoryError):
+        raise
     except Exception as e:
         raise ValueError(f"Error reading file: {str(e)}")
 
-def extract_skills(text):
-    """Extract ONLY skills from the Skills section - STRICT section-based extraction"""
-    skills = set()
-    
-    # Comprehensive list of valid technical skills (for validation)
-    valid_skills = {
-        # Programming Languages
-        'python', 'javascript', 'java', 'c++', 'c#', 'php', 'ruby', 'swift', 'kotlin', 'go', 'rust',
-        'typescript', 'scala', 'perl', 'r', 'matlab', 'dart', 'c', 'objective-c',
-        
-        # Frontend Technologies
-        'react', 'reactjs', 'react.js', 'angular', 'vue', 'vue.js', 'vuejs', 'svelte', 'ember',
-        'jquery', 'next.js', 'nextjs', 'nuxt', 'gatsby', 'html', 'html5', 'css', 'css3',
-        'sass', 'scss', 'less', 'tailwind', 'tailwindcss', 'bootstrap', 'material-ui', 'mui',
-        'webpack', 'vite', 'parcel', 'rollup', 'babel', 'redux', 'mobx', 'zustand',
-        
-        # Backend Technologies
-        'node.js', 'nodejs', 'node', 'express', 'expressjs', 'express.js', 'django', 'flask',
-        'fastapi', 'spring', 'spring boot', 'springboot', 'laravel', 'rails', 'ruby on rails',
-        'asp.net', '.net', 'dotnet', 'nestjs', 'fastify', 'koa', 'hapi',
-        
-        # Databases
-        'sql', 'mysql', 'postgresql', 'postgres', 'mongodb', 'redis', 'sqlite', 'mariadb',
-        'oracle', 'mssql', 'sql server', 'dynamodb', 'cassandra', 'couchdb', 'firebase',
-        'firestore', 'realm', 'nosql', 'elasticsearch', 'neo4j',
-        
-        # Cloud & DevOps
-        'aws', 'amazon web services', 'azure', 'gcp', 'google cloud', 'docker', 'kubernetes',
-        'k8s', 'jenkins', 'ci/cd', 'gitlab', 'github actions', 'travis ci', 'circleci',
-        'terraform', 'ansible', 'chef', 'puppet', 'vagrant', 'heroku', 'netlify', 'vercel',
-        
-        # Tools & Platforms
-        'git', 'github', 'gitlab', 'bitbucket', 'svn', 'mercurial', 'jira', 'confluence',
-        'slack', 'trello', 'asana', 'postman', 'insomnia', 'swagger', 'vscode', 'intellij',
-        'pycharm', 'webstorm', 'eclipse', 'visual studio', 'vim', 'emacs', 'sublime',
-        
-        # APIs & Protocols
-        'rest', 'restful', 'rest api', 'graphql', 'websocket', 'grpc', 'soap', 'json', 'xml',
-        'api', 'microservices', 'oauth', 'jwt', 'http', 'https', 'tcp/ip', 'websockets',
-        
-        # Testing
-        'jest', 'mocha', 'chai', 'jasmine', 'karma', 'cypress', 'selenium', 'puppeteer',
-        'playwright', 'junit', 'pytest', 'unittest', 'testng', 'rspec', 'enzyme',
-        
-        # Mobile Development
-        'react native', 'flutter', 'ios', 'android', 'xamarin', 'ionic', 'cordova',
-        'react-native', 'swift ui', 'swiftui', 'jetpack compose',
-        
-        # Data Science & AI
-        'machine learning', 'deep learning', 'artificial intelligence', 'ai', 'ml',
-        'data science', 'data analysis', 'pandas', 'numpy', 'scikit-learn', 'tensorflow',
-        'pytorch', 'keras', 'opencv', 'nlp', 'computer vision', 'data visualization',
-        
-        # Methodologies
-        'agile', 'scrum', 'kanban', 'waterfall', 'devops', 'tdd', 'bdd', 'ci/cd',
-        'continuous integration', 'continuous deployment',
-        
-        # Other Technical
-        'linux', 'unix', 'windows', 'macos', 'bash', 'powershell', 'shell scripting',
-        'regex', 'markdown', 'latex', 'nginx', 'apache', 'tomcat', 'iis',
-        'rabbitmq', 'kafka', 'activemq', 'memcached', 'varnish', 'prometheus', 'grafana'
-    }
-    
-    # CRITICAL: Only search in the Skills section
+def skills_section_lines(text):
+    """Lines of the Skills section read by extract_skills (empty if there is none)"""
     lines = text.split('\n')
     in_skills_section = False
     skills_section_text = []
@@ -130,14 +156,22 @@ def extract_skills(text):
         if in_skills_section and stripped:
             skills_section_text.append(stripped)
     
+    return skills_section_text
+
+def extract_skills(text):
+    """Extract ONLY skills from the Skills section - STRICT section-based extraction"""
+    skills = set()
+    
+    # CRITICAL: Only search in the Skills section
+    skills_section_text = skills_section_lines(text)
+    
     # If no dedicated skills section found, try bullet points or any skill mentions
     if not skills_section_text:
         print("WARNING: No clear Skills section found, trying alternative extraction", file=sys.stderr)
         # Fallback: extract from entire document but still validate against whitelist
         skills_text = text.lower()
-        for skill in valid_skills:
-            pattern = r'\b' + re.escape(skill) + r'\b'
-            if re.search(pattern, skills_text):
+        for skill, pattern in SKILL_PATTERNS.items():
+            if pattern.search(skills_text):
                 display_skill = skill.title() if skill.islower() else skill
                 if skill in ['html', 'css', 'sql', 'api', 'xml', 'json', 'jwt', 'http', 'https', 'ai', 'ml', 'nlp']:
                     display_skill = skill.upper()
@@ -154,10 +188,8 @@ def extract_skills(text):
     skills_text = ' '.join(skills_section_text).lower()
     
     # Extract skills from the skills section only
-    for skill in valid_skills:
-        # Use word boundaries to avoid partial matches
-        pattern = r'\b' + re.escape(skill) + r'\b'
-        if re.search(pattern, skills_text):
+    for skill, pattern in SKILL_PATTERNS.items():
+        if pattern.search(skills_text):
             # Capitalize properly for display
             display_skill = skill.title() if skill.islower() else skill
             if skill in ['html', 'css', 'sql', 'api', 'xml', 'json', 'jwt', 'http', 'https', 'ai', 'ml', 'nlp']:
@@ -173,9 +205,8 @@ def extract_skills(text):
     print(f"INFO: Extracted {len(extracted_skills)} skills from Skills section", file=sys.stderr)
     return extracted_skills
 
-def extract_experience(text):
-    """Extract work experience information"""
-    doc = nlp(text)
+def experience_section_lines(text):
+    """Lines of the experience section read by extract_experience"""
     experience = []
     
     # Look for experience section
@@ -202,14 +233,19 @@ def extract_experience(text):
         if in_experience_section and line.strip() and len(line.strip()) > 10:
             experience.append(line.strip())
     
+    return experience
+
+def extract_experience(text):
+    """Extract work experience information"""
+    experience = experience_section_lines(text)
+    
     if not experience:
         return ["No work experience section found or couldn't be parsed."]
     
     return experience[:10]  # Limit to 10 entries
 
-def extract_education(text):
-    """Extract education information"""
-    doc = nlp(text)
+def education_section_lines(text):
+    """Lines of the education section read by extract_education"""
     education = []
     
     # Look for education section
@@ -236,14 +272,19 @@ def extract_education(text):
         if in_education_section and line.strip() and len(line.strip()) > 10:
             education.append(line.strip())
     
+    return education
+
+def extract_education(text):
+    """Extract education information"""
+    education = education_section_lines(text)
+    
     if not education:
         return ["No education section found or couldn't be parsed."]
     
     return education[:10]  # Limit to 10 entries
 
-def extract_projects(text):
-    """Extract projects information"""
-    projects = []
+def projects_section_lines(text):
+    """Lines of the Projects section read by extract_projects"""
     lines = text.split('\n')
     in_projects_section = False
     project_text = []
@@ -281,6 +322,13 @@ def extract_projects(text):
         if in_projects_section and stripped and len(stripped) > 15:
             project_text.append(stripped)
     
+    return project_text
+
+def extract_projects(text):
+    """Extract projects information"""
+    projects = []
+    project_text = projects_section_lines(text)
+    
     if not project_text:
         return ["No projects section found or couldn't be parsed."]
     
@@ -330,34 +378,117 @@ def extract_contact_info(text):
         'phones': phones
     }
 
-def main(file_path):
+def field_fingerprints(text):
+    """
+    Section fingerprints plus, for each parsed field, an exact digest of the
+    lines its extractor reads. A field is reused only when that input is
+    unchanged, so an incremental parse always matches a fresh one.
+    'contact' digests the extracted contact details themselves.
+    """
+    fingerprints = fingerprint_sections(text)
+    contact = extract_contact_info(text)
+    fingerprints.update({
+        # Without a Skills section extract_skills scans the whole document
+        "skills": fingerprint_lines(skills_section_lines(text) or [text]),
+        "experience": fingerprint_lines(experience_section_lines(text)),
+        "education": fingerprint_lines(education_section_lines(text)),
+        "projects": fingerprint_lines(projects_section_lines(text)),
+        "contact": fingerprint_lines(sorted(contact['emails']) + [''] + sorted(contact['phones'])),
+    })
+    return fingerprints
+
+# Parsed fields read by resume_ai_analyzer; main() extracts these first
+ANALYSIS_FIELDS = ('skills', 'experience', 'education', 'contact', 'word_count', 'fingerprints', 'minhash')
+
+def main(file_path, previous=None, cancel_token=None, guarded=False, on_fields_ready=None):
+    """
+    Parse a resume file.
+
+    Args:
+        file_path: Path to a PDF or DOCX file
+        previous: Optional earlier result of main() for an edited version of the
+            same resume. Fields whose extractor input is unchanged (per the
+            stored 'fingerprints') are reused instead of re-extracted.
+        cancel_token: Optional CancellationToken checked between pages and
+            extractor stages; a cancelled parse returns {"cancelled": true, ...}
+        guarded: Inspect the document first and extract it in a resource-limited
+            subprocess (see document_guard). Rejected documents return
+            {"rejected": true, ...}; oversized ones are parsed from their first pages.
+        on_fields_ready: Optional callback called with the partial result as soon as
+            every field the AI analyzer reads (ANALYSIS_FIELDS) is available, before
+            the remaining extractors run.
+    """
     try:
         # Extract text from the file
-        text = extract_text(file_path)
+        guard = None
+        if guarded:
+            guard = extract_text_guarded(file_path, cancel_token)
+            if guard["status"] == "rejected":
+                return {"error": f"Document rejected: {guard['reason']}", "rejected": True, "guard": guard["inspection"]}
+            text = guard["text"]
+        else:
+            text = extract_text(file_path, cancel_token)
         
         if not text or len(text.strip()) < 50:  # At least 50 characters
             return {"error": "The document appears to be empty or too short to process."}
         
-        # Process the text
-        result = {
-            "skills": extract_skills(text),
-            "experience": extract_experience(text),
-            "education": extract_education(text),
-            "projects": extract_projects(text),
+        fingerprints = field_fingerprints(text)
+        previous = previous if previous and not previous.get('error') else {}
+        stale = stale_fields(previous.get('fingerprints'), fingerprints)
+        extractors = {
+            "skills": extract_skills,
+            "experience": extract_experience,
+            "education": extract_education,
+            "projects": extract_projects,
+        }
+        
+        # Process the text, re-running only extractors whose sections changed.
+        # Analyzer inputs come first so on_fields_ready can fire before the rest.
+        fields = {}
+        def run(field):
+            check(cancel_token)
+            fields[field] = extractors[field](text) if field in stale or field not in previous else previous[field]
+        for field in extractors:
+            if field in ANALYSIS_FIELDS:
+                run(field)
+        check(cancel_token)
+        details = {
             "contact": extract_contact_info(text),
             "summary": text[:500] + ("..." if len(text) > 500 else ""),
             "word_count": len(text.split()),
-            "char_count": len(text)
+            "char_count": len(text),
+            "fingerprints": fingerprints,
+            "minhash": minhash_signature(text)
         }
+        if guard and guard["status"] == "truncated":
+            details.update({"truncated": True, "truncation_reason": guard["reason"]})
+        if on_fields_ready:
+            on_fields_ready({**fields, **details})
+        for field in extractors:
+            if field not in fields:
+                run(field)
+        result = {**{field: fields[field] for field in extractors}, **details}
+        
+        if previous:
+            reused = sorted(field for field in extractors if field not in stale and field in previous)
+            print(f"INFO: Reused {len(reused)} unchanged sections: {', '.join(reused) or 'none'}", file=sys.stderr)
         
         return result
         
+    except OperationCancelled as e:
+        return {"error": f"Parsing cancelled: {e}", "cancelled": True}
     except Exception as e:
         return {"error": str(e)}
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
-        result = main(sys.argv[1])
+        try:
+            previous = json.loads(sys.argv[2]) if len(sys.argv) > 2 else None
+        except json.JSONDecodeError:
+            print("WARNING: Ignoring invalid previous result JSON", file=sys.stderr)
+            previous = None
+        guarded = os.getenv('RESUME_PARSER_GUARDED', '0') == '1'
+        result = main(sys.argv[1], previous, token_from_environment(), guarded)
         print(json.dumps(result))
     else:
         print(json.dumps({"error": "No file path provided"}))
@@ -0,0 +1,213 @@
+import gc
+import os
+import sys
+import json
+import queue
+import signal
+import threading
+import multiprocessing
+from concurrent.futures import Future
+from multiprocessing import reduction
+from multiprocessing.connection import Connection
+
+import resume_parser
+
+
+def _worker_loop(conn, max_jobs):
+    """Run parse jobs received over `conn` until max_jobs is reached or the pipe closes"""
+    for _ in range(max_jobs):
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        file_path, previous = job
+        conn.send(resume_parser.main(file_path, previous))
+    conn.close()
+
+
+def _fork_server(control, parent_end, max_jobs):
+    """
+    Single-threaded process that forks parser workers on request.
+
+    Each request is a worker pipe end passed with send_handle(); the server
+    forks a worker that serves that pipe and replies with the worker's pid.
+    Forking only ever happens here, never in the threaded pool process.
+    """
+    parent_end.close()  # so closing the pool's end is seen as EOF here
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # exited workers are reaped automatically
+    while True:
+        try:
+            fd = reduction.recv_handle(control)
+        except (EOFError, OSError):
+            break
+        pid = os.fork()
+        if pid == 0:
+            control.close()
+            try:
+                _worker_loop(Connection(fd), max_jobs)
+            finally:
+                os._exit(0)
+        os.close(fd)
+        control.send(pid)
+
+
+class ResumeParserPool:
+    """
+    Prefork pool of resume parser processes.
+
+    A fork server is forked from this process after the heap is frozen with
+    gc.freeze(), and it forks every worker, so they share the loaded parsing
+    libraries instead of each importing its own. All workers are started up front;
+    jobs are dispatched through a queue, a job that exceeds its timeout kills
+    its worker, and workers are replaced after `max_jobs_per_worker` jobs to
+    bound memory growth. Create the pool from the main thread, before
+    starting other threads.
+
+    Usage:
+        with ResumeParserPool(workers=4) as pool:
+            result = pool.parse("resume.pdf")
+    """
+
+    def __init__(self, workers=None, max_jobs_per_worker=100, job_timeout=60):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("ResumeParserPool requires the 'fork' start method (not available on this platform)")
+
+        self.workers = workers or os.cpu_count() or 1
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.job_timeout = job_timeout
+        self._context = multiprocessing.get_context('fork')
+        self._jobs = queue.Queue()
+        self._closed = False
+
+        # Load the document libraries before any worker is forked so their
+        # pages are shared copy-on-write
+        resume_parser.preload()
+
+        # Move everything loaded so far out of the collector's reach so that
+        # GC passes in the workers don't write to (and un-share) those pages
+        gc.collect()
+        gc.freeze()
+
+        # The only fork in this process, made before any pool thread exists
+        self._server, server_conn = self._context.Pipe()
+        self._server_process = self._context.Process(
+            target=_fork_server, args=(server_conn, self._server, self.max_jobs_per_worker), daemon=True
+        )
+        self._server_process.start()
+        server_conn.close()
+        self._server_lock = threading.Lock()
+
+        self._dispatchers = [
+            threading.Thread(target=self._dispatch, args=self._spawn(), name=f"resume-parser-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for dispatcher in self._dispatchers:
+            dispatcher.start()
+
+    def _spawn(self):
+        """Have the fork server start a worker; returns (pid, connection)"""
+        parent_conn, child_conn = self._context.Pipe()
+        with self._server_lock:
+            reduction.send_handle(self._server, child_conn.fileno(), self._server_process.pid)
+            pid = self._server.recv()
+        child_conn.close()
+        return pid, parent_conn
+
+    def _retire(self, pid, conn, kill=False):
+        if kill:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        else:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        conn.close()
+
+    def _dispatch(self, pid, conn):
+        """Feed jobs from the queue to one worker process, replacing it as needed"""
+        jobs_done = 0
+
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            future, file_path, previous, timeout = job
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            if pid is None or jobs_done >= self.max_jobs_per_worker:
+                if pid is not None:
+                    self._retire(pid, conn)
+                pid, conn = self._spawn()
+                jobs_done = 0
+
+            try:
+                conn.send((file_path, previous))
+                if conn.poll(timeout):
+                    result = conn.recv()
+                    jobs_done += 1
+                else:
+                    result = {"error": f"Parsing timed out after {timeout} seconds"}
+                    self._retire(pid, conn, kill=True)
+                    pid, conn = None, None
+            except (EOFError, BrokenPipeError, OSError) as e:
+                result = {"error": f"Parser worker crashed: {str(e) or type(e).__name__}"}
+                self._retire(pid, conn, kill=True)
+                pid, conn = None, None
+
+            future.set_result(result)
+
+        if pid is not None:
+            self._retire(pid, conn)
+
+    def submit(self, file_path, previous=None, timeout=None):
+        """Queue a resume for parsing; returns a Future resolving to resume_parser.main()'s result"""
+        if self._closed:
+            raise RuntimeError("ResumeParserPool is closed")
+        future = Future()
+        self._jobs.put((future, str(file_path), previous, timeout or self.job_timeout))
+        return future
+
+    def parse(self, file_path, previous=None, timeout=None):
+        """Parse one resume and wait for the result"""
+        return self.submit(file_path, previous, timeout).result()
+
+    def map(self, file_paths, timeout=None):
+        """Parse several resumes in parallel, returning results in input order"""
+        futures = [self.submit(file_path, timeout=timeout) for file_path in file_paths]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """Finish queued jobs, then stop all workers"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._dispatchers:
+            self._jobs.put(None)
+        for dispatcher in self._dispatchers:
+            dispatcher.join()
+        self._server.close()
+        self._server_process.join()
+        gc.unfreeze()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({"error": "No file paths provided"}))
+        sys.exit(1)
+
+    workers = int(os.getenv('RESUME_PARSER_WORKERS', '0')) or None
+    with ResumeParserPool(workers=workers) as pool:
+        results = pool.map(sys.argv[1:])
+    print(json.dumps(results))
@@ -0,0 +1,94 @@
+import os
+import sys
+import json
+import threading
+from concurrent.futures import Future
+import resume_parser
+from cancellation import token_from_environment
+from resume_ai_analyzer import analyze_resume_with_ai, calculate_basic_score, with_basic_fallback
+
+
+def _analyze_into(future, resume_data, job_description, previous_analysis, budget_seconds, depth, cancel_token, owner):
+    try:
+        future.set_result(analyze_resume_with_ai(
+            resume_data, job_description, previous_analysis,
+            budget_seconds=budget_seconds, depth=depth, cancel_token=cancel_token, owner=owner
+        ))
+    except Exception as e:
+        future.set_result({"error": f"Analysis failed: {str(e)}"})
+
+
+def run_pipeline(file_path, job_description=None, analyze=True, previous=None, previous_analysis=None,
+                 budget_seconds=None, depth='standard', cancel_token=None, guarded=False, owner=None):
+    """
+    Parse, score and (optionally) analyze a resume in one process.
+
+    The AI analysis starts on a background thread as soon as the parser has
+    the fields it reads (see resume_parser.ANALYSIS_FIELDS), so the model call
+    overlaps with the remaining extractors instead of waiting for a second
+    process.
+
+    Args:
+        file_path: Path to a PDF or DOCX file
+        job_description: Optional job description to analyze against
+        analyze: Run the AI analysis; otherwise only parse and basic-score
+        previous: Optional earlier parse result (see resume_parser.main)
+        previous_analysis: Optional earlier analysis (see analyze_resume_with_ai)
+        budget_seconds: Optional latency budget for the AI analysis
+        depth: 'quick', 'standard' or 'deep' model tier
+        cancel_token: Optional CancellationToken shared by parsing and analysis
+        guarded: Extract the document under resource limits (see document_guard)
+        owner: ID of the user the resume belongs to (scopes near-duplicate reuse)
+
+    Returns:
+        The parse result plus 'basic_score' and, when analyze is set,
+        'analysis' (falling back to basic scoring if the AI call failed).
+        Parse errors are returned as-is.
+    """
+    analysis = None
+
+    def start_analysis(resume_data):
+        nonlocal analysis
+        analysis = Future()
+        threading.Thread(
+            target=_analyze_into,
+            args=(analysis, resume_data, job_description, previous_analysis, budget_seconds, depth, cancel_token, owner),
+            daemon=True
+        ).start()
+
+    result = resume_parser.main(file_path, previous, cancel_token, guarded, start_analysis if analyze else None)
+    if result.get('error'):
+        # Cancellation is shared, so a running analysis stops on its own
+        return result
+
+    result["basic_score"] = calculate_basic_score(result)
+    if analysis is not None:
+        ai_result = analysis.result()
+        result["analysis"] = with_basic_fallback(ai_result, result)
+        if ai_result.get('cancelled'):
+            return {"error": ai_result.get('error'), "cancelled": True}
+    return result
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({"error": "No file path provided"}))
+        sys.exit(1)
+
+    job_description = sys.argv[2] if len(sys.argv) > 2 and sys.argv[2] else None
+    try:
+        previous = json.loads(sys.argv[3]) if len(sys.argv) > 3 else None
+    except json.JSONDecodeError:
+        print("WARNING: Ignoring invalid previous result JSON", file=sys.stderr)
+        previous = None
+    budget = os.getenv('LLM_BUDGET_SECONDS')
+    result = run_pipeline(
+        sys.argv[1], job_description, previous=previous,
+        analyze=os.getenv('PIPELINE_ANALYZE', '1') == '1',
+        budget_seconds=float(budget) if budget else None,
+        depth=os.getenv('ANALYSIS_DEPTH', 'standard'),
+        cancel_token=token_from_environment(),
+        guarded=os.getenv('RESUME_PARSER_GUARDED', '0') == '1',
+        owner=os.getenv('ANALYSIS_OWNER') or None
+    )
+    print(json.dumps(result))
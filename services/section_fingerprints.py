@@ -0,0 +1,146 @@
+import re
+import json
+import hashlib
+
+# Headings that start a new resume section, mapped to a canonical section name
+SECTION_HEADINGS = [
+    ('skills', r'(?i)^(?:technical\s+|core\s+(?:technical\s+)?|key\s+)?skills?\s*:?\s*$'),
+    ('skills', r'(?i)^competencies\s*:?\s*$'),
+    ('experience', r'(?i)^(?:work\s+|professional\s+)?experience\s*:?\s*$'),
+    ('experience', r'(?i)^(?:professional\s+)?(?:employment\s+)?history\s*:?\s*$'),
+    ('education', r'(?i)^education\s*:?\s*$'),
+    ('education', r'(?i)^academic\s+(?:background|qualifications)\s*:?\s*$'),
+    ('projects', r'(?i)^(?:personal\s+|academic\s+|key\s+)?projects?\s*:?\s*$'),
+    ('certifications', r'(?i)^certifications?\s*:?\s*$'),
+    ('awards', r'(?i)^awards?\s*:?\s*$'),
+    ('summary', r'(?i)^(?:summary|objective|profile)\s*:?\s*$'),
+]
+
+# Parsed fields and the fingerprints they are derived from. resume_parser
+# stores, under each field's name, a digest of the exact lines its extractor
+# reads (see resume_parser.field_fingerprints), replacing the section digest.
+FIELD_DEPENDENCIES = {
+    'skills': ('skills',),
+    'experience': ('experience',),
+    'education': ('education',),
+    'projects': ('projects',),
+}
+
+# Analysis inputs (see resume_ai_analyzer) and the fingerprints they depend on
+ANALYSIS_DEPENDENCIES = {
+    'skills': ('skills',),
+    'experience': ('experience',),
+    'education': ('education',),
+    'contact': ('contact',),
+}
+
+# Improvement inputs (see resume_improvement_ai) and the fingerprints they depend on
+IMPROVEMENT_DEPENDENCIES = {
+    'skills': ('skills',),
+    'experience': ('experience',),
+    'education': ('education',),
+}
+
+
+def fingerprint_text(text):
+    """Stable short hash of whitespace/case-normalized text"""
+    normalized = re.sub(r'\s+', ' ', text).strip().lower()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def fingerprint_lines(lines):
+    """Exact (unnormalized) hash of a list of lines, e.g. the input an extractor reads"""
+    return hashlib.sha256(json.dumps(lines).encode('utf-8')).hexdigest()[:16]
+
+
+def split_sections(text):
+    """
+    Split resume text into sections keyed by canonical heading name.
+    Text before the first heading is returned as the 'header' section.
+    Repeated headings are merged into one section.
+    """
+    sections = {'header': []}
+    order = ['header']
+    current = 'header'
+
+    for line in text.split('\n'):
+        stripped = line.strip()
+        heading = next((name for name, pattern in SECTION_HEADINGS if re.match(pattern, stripped)), None)
+        if heading:
+            current = heading
+            if heading not in sections:
+                sections[heading] = []
+                order.append(heading)
+            continue
+        if stripped:
+            sections[current].append(stripped)
+
+    return {name: '\n'.join(sections[name]) for name in order}
+
+
+def fingerprint_sections(text):
+    """
+    Compute per-section content fingerprints for a resume.
+
+    Returns:
+        Dict mapping section name to digest, plus '_layout' (the ordered
+        list of headings) and '_document' (the whole text).
+    """
+    sections = split_sections(text)
+    fingerprints = {name: fingerprint_text(body) for name, body in sections.items()}
+    fingerprints['_layout'] = fingerprint_text('|'.join(sections.keys()))
+    fingerprints['_document'] = fingerprint_text(text)
+    return fingerprints
+
+
+def changed_sections(previous, current):
+    """
+    Return the set of section names whose fingerprint differs between two
+    fingerprint dicts. Missing or empty previous fingerprints mean everything
+    changed; a layout change is reported as '_layout'.
+    """
+    if not previous or not current:
+        return set(current or {}) | {'_layout'}
+
+    names = (set(previous) | set(current)) - {'_document'}
+    return {name for name in names if previous.get(name) != current.get(name)}
+
+
+def stale_fields(previous, current, dependencies=FIELD_DEPENDENCIES):
+    """
+    Return the fields from `dependencies` that must be recomputed.
+
+    A field is stale when the section layout changed, or when one of the
+    fingerprints it depends on changed or is missing.
+    """
+    changed = changed_sections(previous, current)
+    if '_layout' in changed:
+        return set(dependencies)
+
+    stale = set()
+    for field, sections in dependencies.items():
+        if any(name in changed or name not in current for name in sections):
+            stale.add(field)
+    return stale
+
+
+def reusable_result(previous_result, current_fingerprints, dependencies, previous_fingerprints=None):
+    """
+    Decide how much of a previously generated result can be kept.
+
+    Returns:
+        (previous_result, stale) where previous_result is None when it is
+        unusable (errored, no fingerprints, or every dependency changed) and
+        stale is the set of dependency keys that must be regenerated.
+    """
+    if not previous_result or 'error' in previous_result:
+        return None, set(dependencies)
+
+    previous_fingerprints = previous_fingerprints or previous_result.get('fingerprints')
+    if not previous_fingerprints or not current_fingerprints:
+        return None, set(dependencies)
+
+    stale = stale_fields(previous_fingerprints, current_fingerprints, dependencies)
+    if len(stale) == len(dependencies):
+        return None, stale
+    return previous_result, stale
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Import-time budget checks for the Python services.
+
+Measures each service module with `python -X importtime` and checks that it
+stays within its budget and does not pull in heavy libraries (spaCy,
+pdfplumber, docx2txt, google-generativeai) that are only needed later. Also
+checks that parsing a DOCX loads neither spaCy nor pdfplumber.
+"""
+
+import os
+import sys
+import zipfile
+import tempfile
+import subprocess
+
+SERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'services')
+
+# Module -> cumulative import time budget in milliseconds
+IMPORT_BUDGETS_MS = {
+    'resume_ai_analyzer': 75,
+    'resume_improvement_ai': 75,
+    'resume_parser': 100,
+    'resume_pipeline': 100,
+}
+
+HEAVY_MODULES = ['spacy', 'pdfplumber', 'docx2txt', 'google.generativeai']
+
+def measure_import(module):
+    """Return ({module name: cumulative microseconds}, error) for importing `module`"""
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SERVICES_DIR,
+        capture_output=True,
+        text=True
+    )
+    if process.returncode != 0:
+        return {}, process.stderr.strip().splitlines()[-1]
+
+    timings = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = int(cumulative)
+    return timings, None
+
+def test_import_budget(module, budget_ms):
+    """Check a service module's import time and that heavy libraries stay unloaded"""
+    timings, error = measure_import(module)
+    if error:
+        print(f"❌ {module}: import failed: {error}")
+        return False
+
+    elapsed_ms = timings.get(module, 0) / 1000
+    heavy = [name for name in HEAVY_MODULES if name in timings]
+    if heavy:
+        print(f"❌ {module}: eagerly imports {', '.join(heavy)}")
+        return False
+    if elapsed_ms > budget_ms:
+        print(f"❌ {module}: import took {elapsed_ms:.1f}ms (budget {budget_ms}ms)")
+        return False
+
+    print(f"✅ {module}: import took {elapsed_ms:.1f}ms (budget {budget_ms}ms)")
+    return True
+
+def write_docx(path, paragraphs):
+    """Write a minimal Word document with one paragraph per line"""
+    body = ''.join(f'<w:p><w:r><w:t>{paragraph}</w:t></w:r></w:p>' for paragraph in paragraphs)
+    with zipfile.ZipFile(path, 'w') as docx:
+        docx.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            '</Types>'
+        ))
+        docx.writestr('word/document.xml', (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{body}</w:body></w:document>'
+        ))
+
+def test_docx_parse_libraries():
+    """Parsing a DOCX only loads docx2txt"""
+    path = os.path.join(tempfile.mkdtemp(), 'resume.docx')
+    write_docx(path, [
+        'Jane Doe', 'jane.doe@example.com',
+        'Experience', 'Software Engineer at Acme Corp, 2019 - 2023',
+        'Education', 'BSc Computer Science, State University',
+        'Skills', 'Python, Docker, PostgreSQL',
+    ])
+    process = subprocess.run(
+        [sys.executable, '-c', (
+            "import sys, resume_parser\n"
+            f"result = resume_parser.main({path!r})\n"
+            "print(result.get('error') or 'loaded: ' + (', '.join(name for name in ('spacy', 'pdfplumber') if name in sys.modules) or 'none'))"
+        )],
+        cwd=SERVICES_DIR,
+        capture_output=True,
+        text=True
+    )
+    lines = process.stdout.strip().splitlines()
+    if process.returncode != 0 or not lines:
+        print(f"❌ DOCX parse: failed: {process.stderr.strip()}")
+        return False
+    if lines[-1] != 'loaded: none':
+        print(f"❌ DOCX parse: {lines[-1]}")
+        return False
+    print("✅ DOCX parse: loaded neither spaCy nor pdfplumber")
+    return True
+
+def main():
+    """Run all import budget checks"""
+    print("Testing service import times")
+    print("=" * 40)
+
+    results = [test_import_budget(module, budget) for module, budget in IMPORT_BUDGETS_MS.items()]
+    results.append(test_docx_parse_libraries())
+
+    print("\n" + "=" * 40)
+    if all(results):
+        print("🎉 All import budgets met!")
+    else:
+        print("⚠️  Some import budgets were exceeded. Check the errors above.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
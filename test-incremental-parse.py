@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Incremental re-parse checks for the resume parser.
+
+Parses an original resume, then each edited version twice: fresh, and with
+the original result as `previous`. Both parses must give the same fields.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'services'))
+
+import resume_parser
+
+ORIGINAL = """John Doe
+john.doe@example.com | 555-123-4567
+Summary
+Backend engineer with 6 years of professional experience in Python services
+Built payment APIs at Acme Corp serving 2M requests per day
+Experience
+Senior Engineer, Acme Corp 2019-2024
+Led migration of a monolith to microservices on Kubernetes
+Skills
+Python, SQL, Docker, Kubernetes
+Education
+BSc Computer Science, State University 2018
+Projects
+- Open source resume parser built with spaCy and Flask
+"""
+
+# Edit name -> edited resume text
+EDITS = {
+    'summary line': ORIGINAL.replace(
+        'Backend engineer with 6 years of professional experience in Python services',
+        'Backend engineer focused on Python services'
+    ),
+    'new degree in summary': ORIGINAL.replace('Summary\n', 'Summary\nHolds a degree in mathematics\n'),
+    'skills': ORIGINAL.replace('Python, SQL, Docker, Kubernetes', 'Python, SQL, Docker, React'),
+    'experience': ORIGINAL.replace('Senior Engineer, Acme Corp 2019-2024', 'Staff Engineer, Acme Corp 2019-2025'),
+    'contact': ORIGINAL.replace('555-123-4567', '555-987-6543'),
+    'unchanged': ORIGINAL,
+}
+
+COMPARED_FIELDS = ('skills', 'experience', 'education', 'projects', 'contact')
+
+def parse(text, previous=None):
+    """Run resume_parser.main on `text` instead of a file"""
+    resume_parser.extract_text = lambda file_path, *args, **kwargs: text
+    return resume_parser.main('resume.docx', previous)
+
+def test_incremental_matches_fresh(name, edited, original_result):
+    """Check that an incremental parse of `edited` equals a fresh one"""
+    fresh = parse(edited)
+    incremental = parse(edited, original_result)
+    mismatched = [field for field in COMPARED_FIELDS if fresh.get(field) != incremental.get(field)]
+    if mismatched:
+        print(f"❌ {name}: incremental parse differs in {', '.join(mismatched)}")
+        return False
+    print(f"✅ {name}: incremental parse matches fresh parse")
+    return True
+
+def main():
+    """Run all incremental parse checks"""
+    print("Testing incremental re-parsing")
+    print("=" * 40)
+
+    original_result = parse(ORIGINAL)
+    if original_result.get('error'):
+        print(f"❌ Could not parse the original resume: {original_result['error']}")
+        sys.exit(1)
+
+    results = [test_incremental_matches_fresh(name, edited, original_result) for name, edited in EDITS.items()]
+
+    print("\n" + "=" * 40)
+    if all(results):
+        print("🎉 Incremental parses match fresh parses!")
+    else:
+        print("⚠️  Some incremental parses reused stale fields. Check the errors above.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Checks for near-duplicate resume detection (services/near_duplicate.py).
+
+Runs against a throwaway SQLite index. Signatures are passed through a
+float64 round trip, as they are when the web app sends a parsed resume back
+to the analyzer.
+"""
+
+import os
+import sys
+import json
+import struct
+import tempfile
+
+# The index path is read at import time
+os.environ['NEAR_DUPLICATE_DB_PATH'] = os.path.join(tempfile.mkdtemp(), 'near_duplicates.sqlite3')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'services'))
+
+import resume_ai_analyzer
+from near_duplicate import THRESHOLD, estimate_similarity, find_near_duplicate, minhash_signature, store_analysis
+from resume_parser import field_fingerprints
+
+RESUME = """Jane Doe
+jane.doe@example.com | +1 555 123 4567
+Summary
+Backend engineer building data pipelines and APIs for analytics products.
+Experience
+Senior Software Engineer, Acme Corp, 2019 - 2023
+- Designed a streaming ingestion service processing billions of events per day
+- Led the migration of batch jobs from cron scripts to Airflow
+- Mentored four engineers and ran the on-call rotation
+Software Engineer, Initech, 2015 - 2019
+- Built REST APIs in Python and Go for the billing platform
+- Cut report generation time by moving aggregation into PostgreSQL
+Education
+BSc Computer Science, State University, 2015
+Skills
+Python, Go, PostgreSQL, Kafka, Airflow, Docker, Kubernetes
+"""
+
+TRIVIAL_EDIT = (
+    RESUME.replace('jane.doe@example.com', 'jdoe@mail.example.org')
+    .replace('+1 555 123 4567', '+1 555 987 6543')
+)
+
+# Similar enough to clear the threshold, but the analysis would quote stale fields
+ADDED_SKILLS = RESUME.replace('Docker, Kubernetes', 'Docker, Kubernetes, Terraform, AWS')
+SHORTENED_BULLET = RESUME.replace(' processing billions of events per day', '')
+
+REAL_CHANGE = """Jane Doe
+Summary
+Product designer focused on research-driven mobile experiences.
+Experience
+Lead Designer, Globex, 2018 - 2023
+- Ran user research for the onboarding redesign
+- Built the design system used across three apps
+Skills
+Figma, prototyping, usability testing
+"""
+
+def through_javascript(signature):
+    """Round-trip a signature through JSON numbers held as float64, like JSON.parse"""
+    return [int(struct.unpack('<d', struct.pack('<d', float(value)))[0]) for value in json.loads(json.dumps(signature))]
+
+def inputs(text):
+    """The analysis-input fingerprints the analyzer stores with each entry"""
+    fingerprints = field_fingerprints(text)
+    return {field: fingerprints[field] for field in resume_ai_analyzer.NEAR_DUPLICATE_INPUTS}
+
+def lookups_with_previous_analysis():
+    """Number of index lookups the analyzer makes when given a usable previous analysis"""
+    calls = []
+    resume_data = {'fingerprints': field_fingerprints(ADDED_SKILLS), 'minhash': minhash_signature(ADDED_SKILLS)}
+    previous = {'overall_score': 70, 'fingerprints': field_fingerprints(RESUME), 'job_description_fingerprint': None}
+    original = resume_ai_analyzer.find_near_duplicate
+    resume_ai_analyzer.find_near_duplicate = lambda *args: calls.append(args) or (None, None)
+    # Without an API key the analyzer stops right after the lookup would happen
+    api_key = os.environ.pop('GEMINI_API_KEY', None)
+    try:
+        resume_ai_analyzer.analyze_resume_with_ai(resume_data, previous_result=previous, owner='user-1')
+    finally:
+        resume_ai_analyzer.find_near_duplicate = original
+        if api_key:
+            os.environ['GEMINI_API_KEY'] = api_key
+    return len(calls)
+
+def check(name, condition, detail=''):
+    if not condition:
+        print(f"❌ {name}{': ' + detail if detail else ''}")
+        return False
+    print(f"✅ {name}{': ' + detail if detail else ''}")
+    return True
+
+def main():
+    """Run all near-duplicate checks"""
+    print("Testing near-duplicate detection")
+    print("=" * 40)
+
+    signature = minhash_signature(RESUME)
+    trivial = estimate_similarity(signature, minhash_signature(TRIVIAL_EDIT))
+    different = estimate_similarity(signature, minhash_signature(REAL_CHANGE))
+    analysis = {'overall_score': 78, 'suggestions': ['Quantify the mentoring impact']}
+    store_analysis(signature, 'user-1:jd:standard', inputs(RESUME), analysis)
+
+    def lookup(text, scope='user-1:jd:standard'):
+        return find_near_duplicate(through_javascript(minhash_signature(text)), scope, inputs(text))
+
+    found, similarity = lookup(TRIVIAL_EDIT)
+    other_user, _ = lookup(RESUME, 'user-2:jd:standard')
+    other_resume, _ = lookup(REAL_CHANGE)
+    added_skills, _ = lookup(ADDED_SKILLS)
+    shortened_bullet, _ = lookup(SHORTENED_BULLET)
+    skills_similarity = estimate_similarity(signature, minhash_signature(ADDED_SKILLS))
+
+    results = [
+        check('signature survives JSON in JavaScript', through_javascript(signature) == signature),
+        check('trivial edits stay above the threshold', trivial >= THRESHOLD, f"similarity {trivial:.2f}"),
+        check('a different resume stays below it', different < THRESHOLD, f"similarity {different:.2f}"),
+        check('stored analysis is found for a trivial edit', found == analysis,
+              f"similarity {similarity:.2f}" if similarity else 'no match'),
+        check('another user never gets the analysis', other_user is None),
+        check('a different resume never gets the analysis', other_resume is None),
+        check('added skills are not reused', added_skills is None, f"similarity {skills_similarity:.2f}"),
+        check('an edited experience bullet is not reused', shortened_bullet is None),
+        check('a usable previous analysis skips the index', lookups_with_previous_analysis() == 0),
+        check('empty text has no signature', minhash_signature('  \n') is None),
+        check('malformed signature is ignored',
+              find_near_duplicate([1.5] * len(signature), 'user-1:jd:standard', inputs(RESUME)) == (None, None)),
+        check('missing inputs are ignored', find_near_duplicate(signature, 'user-1:jd:standard', {'skills': None}) == (None, None)),
+    ]
+
+    print("\n" + "=" * 40)
+    if all(results):
+        print("🎉 All near-duplicate checks passed!")
+    else:
+        print("⚠️  Some near-duplicate checks failed. Check the errors above.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
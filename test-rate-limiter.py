@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Checks for the cross-process Gemini rate limiter (services/rate_limiter.py).
+
+Runs against a throwaway SQLite file with a 60 requests/minute quota, so a
+drained bucket refills one request about every 1.1 seconds.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+SERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'services')
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'rate_limit.sqlite3')
+
+# Limits are read at import time
+os.environ.update({'RATE_LIMIT_DB_PATH': DB_PATH, 'GEMINI_RPM': '60', 'GEMINI_TPM': '0'})
+sys.path.insert(0, SERVICES_DIR)
+
+import rate_limiter
+from cancellation import CancellationToken, OperationCancelled
+
+CAPACITY = int(60 * rate_limiter.QUOTA_HEADROOM)
+
+def drain(bucket):
+    for _ in range(CAPACITY):
+        rate_limiter.acquire(bucket, 0)
+
+def test_burst_within_capacity():
+    """A full bucket serves its capacity without waiting"""
+    started = time.monotonic()
+    drain('burst')
+    elapsed = time.monotonic() - started
+    if elapsed > 5:
+        print(f"❌ burst: {CAPACITY} requests took {elapsed:.1f}s")
+        return False
+    print(f"✅ burst: {CAPACITY} requests served in {elapsed:.2f}s")
+    return True
+
+def test_timeout_when_drained():
+    """A drained bucket raises RateLimitTimeout, then refills over time"""
+    drain('refill')
+    try:
+        rate_limiter.acquire('refill', 0, timeout=0.3)
+        print("❌ drained: acquire succeeded on an empty bucket")
+        return False
+    except rate_limiter.RateLimitTimeout:
+        pass
+    started = time.monotonic()
+    rate_limiter.acquire('refill', 0, timeout=5)
+    waited = time.monotonic() - started
+    if not 0.5 <= waited <= 3:
+        print(f"❌ drained: refill took {waited:.2f}s (expected about 1.1s)")
+        return False
+    print(f"✅ drained: timed out, then refilled after {waited:.2f}s")
+    return True
+
+def test_cancellation():
+    """A waiting caller stops as soon as its token is cancelled"""
+    drain('cancel')
+    token = CancellationToken()
+    token.cancel()
+    try:
+        rate_limiter.acquire('cancel', 0, timeout=5, cancel_token=token)
+    except OperationCancelled:
+        print("✅ cancellation: waiting caller stopped")
+        return True
+    print("❌ cancellation: acquire ignored the cancelled token")
+    return False
+
+def test_shared_across_processes():
+    """Quota drained by one process is not available to another"""
+    drain('shared')
+    child = subprocess.run(
+        [sys.executable, '-c', (
+            "import rate_limiter\n"
+            "try:\n"
+            "    rate_limiter.acquire('shared', 0, timeout=0.3)\n"
+            "    print('acquired')\n"
+            "except rate_limiter.RateLimitTimeout:\n"
+            "    print('timeout')"
+        )],
+        cwd=SERVICES_DIR, env=os.environ, capture_output=True, text=True
+    )
+    if child.stdout.strip() != 'timeout':
+        print(f"❌ shared: other process got {child.stdout.strip() or child.stderr.strip()!r}")
+        return False
+    print("✅ shared: other process had to wait for the drained quota")
+    return True
+
+def test_fails_open():
+    """An unusable store lets calls through instead of blocking them"""
+    original = rate_limiter.RATE_LIMIT_DB_PATH
+    rate_limiter.RATE_LIMIT_DB_PATH = os.path.join(DB_PATH, 'missing', 'rate_limit.sqlite3')
+    try:
+        rate_limiter.acquire('broken', 0, timeout=1)
+    except Exception as e:
+        print(f"❌ fail open: acquire raised {e!r}")
+        return False
+    finally:
+        rate_limiter.RATE_LIMIT_DB_PATH = original
+    print("✅ fail open: broken store did not block the call")
+    return True
+
+def main():
+    """Run all rate limiter checks"""
+    print("Testing the Gemini rate limiter")
+    print("=" * 40)
+
+    results = [
+        test_burst_within_capacity(),
+        test_timeout_when_drained(),
+        test_cancellation(),
+        test_shared_across_processes(),
+        test_fails_open(),
+    ]
+
+    print("\n" + "=" * 40)
+    if all(results):
+        print("🎉 All rate limiter checks passed!")
+    else:
+        print("⚠️  Some rate limiter checks failed. Check the errors above.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Checks for the tolerant model-output decoder (services/response_decoder.py).
+
+Each case feeds a malformed model response through decode_json (and
+validate, as the services do) and compares the result with the expected
+JSON value.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'services'))
+
+from response_decoder import ANALYSIS_SCHEMA, ResponseDecodeError, decode_json, validate
+
+# Case name -> (model response, expected decode_json result)
+REPAIR_CASES = {
+    'plain JSON': ('{"a": 1}', {"a": 1}),
+    'markdown fence': ('```json\n{"a": 1}\n```', {"a": 1}),
+    'preamble and commentary': ('Sure! Here it is:\n{"a": 1}\nHope this helps.', {"a": 1}),
+    'trailing commas': ('{"a": [1, 2,], "b": 3,}', {"a": [1, 2], "b": 3}),
+    'missing commas': ('{"a": 1\n"b": "x"\n"c": [1 2]}', {"a": 1, "b": "x", "c": [1, 2]}),
+    'single quotes': ("{'a': 'it\\'s'}", {"a": "it's"}),
+    'smart quotes': ('{“a”: “b”}', {"a": "b"}),
+    'python literals': ('{"a": True, "b": None, "c": False}', {"a": True, "b": None, "c": False}),
+    'percentages': ('{"score": 72%}', {"score": 72}),
+    'raw newline in string': ('{"a": "line one\nline two"}', {"a": "line one\nline two"}),
+    'unquoted key': ('{score: 5}', {"score": 5}),
+    'truncated string': ('{"a": ["one", "tw', {"a": ["one", "tw"]}),
+    'truncated after colon': ('{"a": 1, "b":', {"a": 1, "b": None}),
+    'dangling key': ('{"a": 1, "b"', {"a": 1, "b": None}),
+    'top-level list': ('[{"id": "R1"}, {"id": "R2"}]', [{"id": "R1"}, {"id": "R2"}]),
+    'truncated list': ('Results:\n[{"id": "R1"}, {"id": "R2"', [{"id": "R1"}, {"id": "R2"}]),
+}
+
+# Case name -> (data, schema, expected validate() result)
+SCHEMA = {
+    'score': {'type': int, 'range': (0, 100)},
+    'tags': {'type': list, 'default': list},
+    'detail': {'type': dict, 'default': dict, 'fields': {'level': {'type': int, 'range': (0, 5), 'default': 0}}},
+}
+VALIDATE_CASES = {
+    'coerces and clamps numbers': ({'score': '150'}, SCHEMA, {'score': 100, 'tags': [], 'detail': {'level': 0}}),
+    'percent string': ({'score': '72%'}, SCHEMA, {'score': 72, 'tags': [], 'detail': {'level': 0}}),
+    'lone item becomes list': ({'score': 1, 'tags': 'x'}, SCHEMA, {'score': 1, 'tags': ['x'], 'detail': {'level': 0}}),
+    'missing object gets nested defaults': ({'score': 1}, SCHEMA, {'score': 1, 'tags': [], 'detail': {'level': 0}}),
+    'bad nested field gets default': ({'score': 1, 'detail': {'level': 'high'}}, SCHEMA, {'score': 1, 'tags': [], 'detail': {'level': 0}}),
+    'unknown fields kept': ({'score': 1, 'extra': True}, SCHEMA, {'score': 1, 'tags': [], 'detail': {'level': 0}, 'extra': True}),
+}
+
+def check(name, actual, expected):
+    if actual != expected:
+        print(f"❌ {name}: got {actual!r}, expected {expected!r}")
+        return False
+    print(f"✅ {name}")
+    return True
+
+def decode_response(text, schema):
+    """Decode and validate a model response the way the services do"""
+    return validate(decode_json(text, schema), schema)
+
+def check_raises(name, function, *args):
+    try:
+        result = function(*args)
+    except ResponseDecodeError:
+        print(f"✅ {name}")
+        return True
+    print(f"❌ {name}: expected ResponseDecodeError, got {result!r}")
+    return False
+
+def main():
+    """Run all decoder checks"""
+    print("Testing model response decoding")
+    print("=" * 40)
+
+    results = [check(name, decode_json(text), expected) for name, (text, expected) in REPAIR_CASES.items()]
+    results += [check(name, validate(data, schema), expected) for name, (data, schema, expected) in VALIDATE_CASES.items()]
+    results += [
+        check(
+            'schema picks the payload after a bracketed preamble',
+            decode_response('Here is my analysis [strict mode]:\n{"overall_score": 61}', ANALYSIS_SCHEMA)['overall_score'],
+            61
+        ),
+        check_raises('missing required field', validate, {'tags': []}, SCHEMA),
+        check_raises('no JSON at all', decode_json, 'I cannot help with that.'),
+        check_raises('list where an object is required', decode_response, '[1, 2]', ANALYSIS_SCHEMA),
+    ]
+
+    print("\n" + "=" * 40)
+    if all(results):
+        print("🎉 All decoder checks passed!")
+    else:
+        print("⚠️  Some decoder checks failed. Check the errors above.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()